@@ -0,0 +1,37 @@
+# Script to compare decoding each level's layer pngs one at a time against decoding them concurrently, not run by game
+# Usage: python benchmark_decode.py [workers] [repeats]
+import os, sys, json, time
+from concurrent.futures import ThreadPoolExecutor
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "")
+sys.path.insert(0, SRC_DIRECTORY)
+from Packages import LevelAssets
+
+def time_decode(filenames, executor, repeats):
+    """ Times decoding filenames, returning best of repeats in milliseconds """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        LevelAssets.decode_images(filenames, executor)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else min(4, os.cpu_count() or 1)
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    levels_directory = os.path.join(SRC_DIRECTORY, "Levels", "")
+    names = sorted(name for name in os.listdir(levels_directory) if not name.startswith(".") and os.path.exists(levels_directory + name + "/level.json"))
+
+    print(f"{'level':<24}{'layers':>8}{'serial ms':>12}{'parallel ms':>14}{'speedup':>10}")
+    total_serial, total_parallel = 0, 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name in names:
+            with open(levels_directory + name + "/level.json") as json_file:
+                level_json_data = json.load(json_file)
+            filenames = [levels_directory + name + "/" + layer["filename"] for layer in level_json_data["layers"]]
+            serial = time_decode(filenames, None, repeats)
+            parallel = time_decode(filenames, executor, repeats)
+            total_serial += serial
+            total_parallel += parallel
+            print(f"{name:<24}{len(filenames):>8}{serial:>12.1f}{parallel:>14.1f}{serial/parallel:>9.2f}x")
+    print(f"{'total':<24}{'':>8}{total_serial:>12.1f}{total_parallel:>14.1f}{total_serial/total_parallel:>9.2f}x")
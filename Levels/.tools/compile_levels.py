@@ -0,0 +1,14 @@
+# Script to compile each level directory into a single level.bundle loaded by the game in place of json and pngs, not run by game
+# Usage: python compile_levels.py [level names], compiles every level by default
+import os, sys
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "")
+sys.path.insert(0, SRC_DIRECTORY)
+from Packages import LevelBundle
+
+if __name__ == "__main__":
+    levels_directory = os.path.join(SRC_DIRECTORY, "Levels", "")
+    names = sys.argv[1:] or sorted(name for name in os.listdir(levels_directory) if not name.startswith(".") and os.path.exists(levels_directory + name + "/level.json"))
+    for name in names:
+        bundle_filename = LevelBundle.write(levels_directory + name + "/")
+        print(f"{bundle_filename}: {os.path.getsize(bundle_filename)/1024/1024:.1f}MB")
@@ -0,0 +1,26 @@
+# Script to report how many physical colliders each level has before and after merging, as done by the game when loading levels, not run by game
+# Usage: python merge_colliders.py [level names], reports every level by default
+import os, sys, json
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "")
+sys.path.insert(0, SRC_DIRECTORY)
+import pygame
+from Packages import Collision
+
+if __name__ == "__main__":
+    levels_directory = os.path.join(SRC_DIRECTORY, "Levels", "")
+    names = sys.argv[1:] or sorted(name for name in os.listdir(levels_directory) if not name.startswith(".") and os.path.exists(levels_directory + name + "/level.json"))
+
+    print(f"{'level':<24}{'before':>8}{'after':>8}")
+    total_before, total_after = 0, 0
+    for name in names:
+        with open(levels_directory + name + "/level.json") as json_file:
+            level_json_data = json.load(json_file)
+        with open(levels_directory + name + "/" + level_json_data["entities"]["filename"]) as json_file:
+            json_data = json.load(json_file)
+        rects = [pygame.Rect(collider["x"], collider["y"], collider["width"], collider["height"]) for collider in json_data.get("collisions", [])]
+        merged = Collision.merge_rects(rects)
+        total_before += len(rects)
+        total_after += len(merged)
+        print(f"{name:<24}{len(rects):>8}{len(merged):>8}")
+    print(f"{'total':<24}{total_before:>8}{total_after:>8}")
@@ -0,0 +1,123 @@
+from Packages import Collision
+
+# NumPy is optional, without it enemies are always moved one at a time
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class EnemyBatch():
+    """ Moves every enemy of a level at once, sweeping all of their colliders against all solid colliders as array operations.
+    Enemies update their velocities before and respond to collisions after the batched move, so results match Enemy.physics_process.
+    Requires numpy, check is_available before use.
+    """
+    def __init__(self):
+        # Solid static colliders as arrays of edges, rebuilt whenever the collision world's static colliders change
+        self.static = None
+        self.static_count = 0
+        self.edges = None
+
+    @staticmethod
+    def is_available():
+        """ Returns whether numpy could be imported """
+        return not numpy == None
+
+    def get_solid_edges(self, world, layers=Collision.SOLID):
+        """ Returns array of left, top, right and bottom edges of every enabled collider within layers, one collider per row.
+
+        Args:
+            world (Collision.CollisionWorld): Collision world of level (required).
+            layers (int): Bitmask of layers to include.
+        """
+        if not (self.static is world.static and self.static_count == len(world.static)):
+            # Rectangles with no area never collide, as with pygame.Rect.colliderect
+            rects = [collider.rect for collider in world.static.items if collider.layer & layers and collider.rect.width > 0 and collider.rect.height > 0]
+            self.edges = numpy.array([(rect.left, rect.top, rect.right, rect.bottom) for rect in rects], dtype=numpy.float64).reshape(-1, 4)
+            self.static = world.static
+            self.static_count = len(world.static)
+
+        # Dynamic colliders move every frame so are never cached
+        dynamic = [collider.rect for collider in world.dynamic if collider.layer & layers and collider.enabled and collider.rect.width > 0 and collider.rect.height > 0]
+        if len(dynamic) == 0:
+            return self.edges
+        return numpy.concatenate((self.edges, numpy.array([(rect.left, rect.top, rect.right, rect.bottom) for rect in dynamic], dtype=numpy.float64)))
+
+    @staticmethod
+    def sweep_axis(position, size, delta, axis, edges):
+        """ Moves boxes along a single axis, stopping each at time of impact with first collider in its path, as with Collision.sweep_axis.
+        Returns tuple of arrays of distance each box can move and whether it was stopped by a collider.
+
+        Args:
+            position (numpy.ndarray): Level space top left of each box, shape (n, 2) (required).
+            size (numpy.ndarray): Width and height of each box, shape (n, 2) (required).
+            delta (numpy.ndarray): Distance to move each box along axis, shape (n,) (required).
+            axis (int): 0 to move along x, 1 to move along y (required).
+            edges (numpy.ndarray): Edges of colliders returned by get_solid_edges, shape (m, 4) (required).
+        """
+        other = 1 - axis
+        start = position[:, axis, None]
+        end = start + size[:, axis, None]
+        near, far = edges[None, :, axis], edges[None, :, axis+2]
+        d = delta[:, None]
+
+        # Colliders which are only touched along the other axis are slid past
+        overlaps = (position[:, other, None] < edges[None, :, other+2] - Collision.TOUCH_EPSILON) & (position[:, other, None] + size[:, other, None] > edges[None, :, other] + Collision.TOUCH_EPSILON)
+        forward = overlaps & (d > 0) & (end <= near + Collision.TOUCH_EPSILON) & (end + d > near)
+        backward = overlaps & (d < 0) & (start >= far - Collision.TOUCH_EPSILON) & (start + d < far)
+
+        # Each box stops at the nearest collider it would pass into
+        stop_forward = numpy.where(forward, numpy.maximum(near - end, 0), numpy.inf).min(axis=1, initial=numpy.inf)
+        stop_backward = numpy.where(backward, numpy.minimum(far - start, 0), -numpy.inf).max(axis=1, initial=-numpy.inf)
+        hit_forward, hit_backward = forward.any(axis=1), backward.any(axis=1)
+        delta = numpy.where(hit_forward, stop_forward, numpy.where(hit_backward, stop_backward, delta))
+        return delta, hit_forward | hit_backward
+
+    def move(self, enemies, delta, world):
+        """ Applies velocities of enemies using dx = v * dt, moving along x then y until touching a solid collider.
+        Returns tuple of lists of whether horizontal and vertical movement of each enemy was stopped by a collider.
+
+        Args:
+            enemies ([Enemy.Enemy]): Enemies to move, positions are updated in place (required).
+            delta (float): Constant physics tick, eg. 1 / fps (required).
+            world (Collision.CollisionWorld): Collision world of level (required).
+        """
+        positions = numpy.array([(enemy.position.x, enemy.position.y) for enemy in enemies], dtype=numpy.float64)
+        offsets = numpy.array([(enemy.collider_offset.x, enemy.collider_offset.y) for enemy in enemies], dtype=numpy.float64)
+        sizes = numpy.array([enemy.collider.size for enemy in enemies], dtype=numpy.float64)
+        # Movement is scaled per enemy as a vector so it rounds exactly as in Enemy.physics_process
+        movements = numpy.array([(movement.x, movement.y) for movement in (enemy.velocity * delta for enemy in enemies)], dtype=numpy.float64)
+        edges = self.get_solid_edges(world)
+
+        # Resolve x first so boxes slide along floors, then y from the new x position
+        movements[:, 0], hit_x = self.sweep_axis(positions + offsets, sizes, movements[:, 0], 0, edges)
+        positions[:, 0] += movements[:, 0]
+        movements[:, 1], hit_y = self.sweep_axis(positions + offsets, sizes, movements[:, 1], 1, edges)
+        positions[:, 1] += movements[:, 1]
+
+        for enemy, (x, y) in zip(enemies, positions.tolist()):
+            enemy.position.xy = x, y
+        return hit_x.tolist(), hit_y.tolist()
+
+    def physics_process(self, enemies, delta, world, player_position=None, attack_colliders=None):
+        """ Calculates physics of every enemy with a single batched move, replacing a call of physics_process on each.
+        Returns True if any enemy was hit by player else False
+
+        Args:
+            enemies ([Enemy.Enemy]): Enemies of level, of any enemy type (required).
+            delta (float): Constant physics tick, eg. 1 / fps (required).
+            world (Collision.CollisionWorld): Collision world of level (required).
+            player_position (pygame.Vector2): Level space position of player.
+            attack_colliders ([pygame.Rect]): List of rectangles which will damage an enemy, eg. list of player attack colliders.
+        """
+        # Velocities are updated in order of enemies, so random drift of flying enemies is drawn in the same order as when unbatched
+        moving = [enemy for enemy in enemies if enemy.begin_physics(delta, player_position)]
+
+        is_damaged = False
+        if len(moving) > 0:
+            hits_x, hits_y = self.move(moving, delta, world)
+            for enemy, hit_x, hit_y in zip(moving, hits_x, hits_y):
+                if enemy.end_physics(world, player_position, attack_colliders, hit_x, hit_y):
+                    is_damaged = True
+        for enemy in enemies:
+            enemy.update_colliders()
+        return is_damaged
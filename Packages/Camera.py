@@ -1,4 +1,4 @@
-import pygame, copy
+import pygame, copy, math
 
 class Camera():
     """ Manages position of camera, whoose position offsets all rendering.
@@ -20,6 +20,27 @@ class Camera():
         self.max_speed = max_move_speed
         self.min_speed = min_move_speed
         self.max_offset = max_offset
+        # Position before last physics step, used to interpolate rendering between steps
+        self.previous_step_position = None
+    def save_physics_state(self):
+        """ Saves position before a physics step so rendering can interpolate between steps """
+        self.previous_step_position = pygame.Vector2(self.position)
+    def get_interpolated_position(self, alpha):
+        """ Returns camera position between position before and after the last physics step.
+
+        Args:
+            alpha (float): Fraction of a physics step elapsed since last step, between 0 and 1 (required).
+        """
+        if self.previous_step_position == None:
+            return pygame.Vector2(self.position)
+        return self.previous_step_position.lerp(self.position, alpha)
+    def get_view_rect(self, surface):
+        """ Gets rectangle of surface which remains visible once scaled by camera scale.
+
+        Args:
+            surface (pygame.Surface): Surface which camera space will be rendered to, scaled by camera scale (required).
+        """
+        return pygame.Rect(0, 0, math.ceil(surface.get_width()/self.scale[0]), math.ceil(surface.get_height()/self.scale[1]))
     def update_position(self, focus_position, surface):
         """ Moves camera to keep focus in frame.
         Returns True if camera moved and False otherwise
@@ -67,6 +88,9 @@ class Camera():
         """
         # Scale surface size to level space
         win_width,win_height = surface.get_width()/self.scale[0], surface.get_height()/self.scale[1]
+
+        # Jumping camera shouldn't be interpolated from old position
+        self.previous_step_position = None
         
         # Correct for x and y offsets without accounting for speed
         new_x = -focus_position.x + 0.5*win_width
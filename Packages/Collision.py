@@ -0,0 +1,480 @@
+import pygame, heapq, math
+
+# Tolerance for boxes touching a collider after floating point movement
+TOUCH_EPSILON = 1e-6
+
+# Layers colliders belong to, combined into bitmasks to query several layers at once
+SOLID = 1 << 0
+DEATH = 1 << 1
+HITABLE = 1 << 2
+SAVE = 1 << 3
+WATER = 1 << 4
+TOXIC = 1 << 5
+TRANSITION = 1 << 6
+DIALOG = 1 << 7
+ENEMY = 1 << 8
+ENEMY_WEAPON = 1 << 9
+
+class SpatialHash():
+    """ Broadphase for static rectangles which buckets them into a uniform grid of cells, so overlap queries only test rectangles sharing a cell.
+    Query results keep insertion order, so resolving them matches looping over the original list.
+
+    Args:
+        rects ([pygame.Rect]): Rectangles to insert.
+        items (list): Item returned for each rectangle by queries, the rectangles themselves if None.
+        cell_size (int): Width and height of each cell in level pixels.
+    """
+    def __init__(self, rects=[], items=None, cell_size=64):
+        self.cell_size = cell_size
+        # Lists of rectangle indices keyed by cell coordinates
+        self.cells = {}
+        self.rects = []
+        self.items = []
+        for i, rect in enumerate(rects):
+            self.insert(rect, rect if items == None else items[i])
+
+    def __len__(self):
+        return len(self.rects)
+
+    def get_cell_range(self, rect):
+        """ Returns x and y ranges of cell coordinates which rect overlaps.
+
+        Args:
+            rect (pygame.Rect): Rectangle in level space (required).
+        """
+        # Right and bottom edges are exclusive, as with pygame.Rect.colliderect
+        return (range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1),
+            range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1))
+
+    def insert(self, rect, item=None):
+        """ Adds rectangle to every cell it overlaps, rectangle must not be moved afterwards.
+        Returns index of rectangle.
+
+        Args:
+            rect (pygame.Rect): Rectangle in level space (required).
+            item: Item returned by queries for rectangle, the rectangle itself if None.
+        """
+        index = len(self.rects)
+        self.rects.append(rect)
+        self.items.append(rect if item == None else item)
+        # Rectangles with no area can never collide so aren't stored in any cell
+        if rect.width > 0 and rect.height > 0:
+            xs, ys = self.get_cell_range(rect)
+            for x in xs:
+                for y in ys:
+                    self.cells.setdefault((x, y), []).append(index)
+        return index
+
+    def query_indices(self, rect):
+        """ Returns sorted indices of rectangles overlapping rect.
+
+        Args:
+            rect (pygame.Rect): Rectangle in level space (required).
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        xs, ys = self.get_cell_range(rect)
+        candidates = set()
+        for x in xs:
+            for y in ys:
+                cell = self.cells.get((x, y))
+                if not cell == None:
+                    candidates.update(cell)
+        return sorted(i for i in candidates if rect.colliderect(self.rects[i]))
+
+    def query(self, rect):
+        """ Returns list of items whose rectangles overlap rect, in insertion order.
+
+        Args:
+            rect (pygame.Rect): Rectangle in level space (required).
+        """
+        return [self.items[i] for i in self.query_indices(rect)]
+
+    def collides(self, rect):
+        """ Returns whether any rectangle overlaps rect.
+
+        Args:
+            rect (pygame.Rect): Rectangle in level space (required).
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        xs, ys = self.get_cell_range(rect)
+        for x in xs:
+            for y in ys:
+                for i in self.cells.get((x, y), ()):
+                    if rect.colliderect(self.rects[i]):
+                        return True
+        return False
+
+class Collider():
+    """ Entry of collision world describing a rectangle, the layer it belongs to and the object it belongs to.
+
+    Args:
+        rect (pygame.Rect): Level space rectangle, dynamic colliders reference rectangles their owners move in place (required).
+        layer (int): Single layer collider belongs to, eg. Collision.SOLID (required).
+        item: Object collider belongs to, eg. transition dictionary or enemy.
+    """
+    def __init__(self, rect, layer, item=None):
+        self.rect = rect
+        self.layer = layer
+        self.item = item
+        # Disabled colliders are skipped by queries, eg. enemy weapons between attacks
+        self.enabled = True
+
+class CollisionWorld():
+    """ Holds every collider of a level in typed layers, answering overlap queries across any combination of layers.
+    Static colliders are bucketed into a spatial hash, while dynamic colliders are tested directly since their owners move them every frame.
+
+    Args:
+        cell_size (int): Width and height of spatial hash cells in level pixels.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        """ Removes every static and dynamic collider """
+        self.static = SpatialHash(cell_size=self.cell_size)
+        # Union of layers of static colliders, so queries of other layers skip the spatial hash
+        self.static_layers = 0
+        self.dynamic = []
+        # Tile grid of solid static colliders answering floor probes, built once every static collider is added
+        self.solid_grid = None
+
+    def add_static(self, rect, layer, item=None):
+        """ Adds collider which never moves.
+        Returns collider entry.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle, must not be moved afterwards (required).
+            layer (int): Layer of collider (required).
+            item: Object returned with collider by queries.
+        """
+        collider = Collider(rect, layer, item)
+        self.static.insert(rect, collider)
+        self.static_layers |= layer
+        return collider
+
+    def build_solid_grid(self, tile_size=16):
+        """ Rasterises solid static colliders into a tile grid, so probe_solid indexes cells directly.
+        Must be called again after adding more static colliders.
+
+        Args:
+            tile_size (int): Width and height of each tile in level pixels.
+        """
+        self.solid_grid = TileGrid([collider.rect for collider in self.static.items if collider.layer & SOLID], tile_size)
+
+    def add_dynamic(self, rect, layer, item=None):
+        """ Adds collider whose rectangle is moved in place by its owner.
+        Returns collider entry, which can be disabled while it shouldn't collide.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle, queries always use its current position (required).
+            layer (int): Layer of collider (required).
+            item: Object returned with collider by queries, used to remove it.
+        """
+        collider = Collider(rect, layer, item)
+        self.dynamic.append(collider)
+        return collider
+
+    def remove(self, item):
+        """ Removes every dynamic collider belonging to item.
+
+        Args:
+            item: Object colliders were added with (required).
+        """
+        self.dynamic = [collider for collider in self.dynamic if not collider.item is item]
+
+    def clear_dynamic(self):
+        """ Removes every dynamic collider """
+        self.dynamic = []
+
+    def query(self, rect, layers):
+        """ Returns list of enabled colliders within layers overlapping rect, static colliders first, each in the order they were added.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle (required).
+            layers (int): Bitmask of layers to search, eg. Collision.DEATH | Collision.SAVE (required).
+        """
+        overlaps = []
+        if self.static_layers & layers:
+            overlaps = [collider for collider in self.static.query(rect) if collider.layer & layers]
+        for collider in self.dynamic:
+            if collider.layer & layers and collider.enabled and rect.colliderect(collider.rect):
+                overlaps.append(collider)
+        return overlaps
+
+    def collides(self, rect, layers):
+        """ Returns whether any collider within layers overlaps rect.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle (required).
+            layers (int): Bitmask of layers to search (required).
+        """
+        return len(self.query(rect, layers)) > 0
+
+    def probe_solid(self, rect):
+        """ Returns whether rect overlaps a solid static collider, using tile grid when built, eg. to check for floor beneath entities.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle (required).
+        """
+        if self.solid_grid == None:
+            return self.collides(rect, SOLID)
+        return self.solid_grid.collides(rect)
+
+def first_in_layers(overlaps, layers):
+    """ Returns first collider of query results within layers, or None, so one query can serve several checks.
+
+    Args:
+        overlaps ([Collider]): Colliders returned by CollisionWorld.query (required).
+        layers (int): Bitmask of layers to search for (required).
+    """
+    for collider in overlaps:
+        if collider.layer & layers:
+            return collider
+    return None
+
+def sweep_axis(position, size, delta, axis, world, layers=SOLID):
+    """ Moves box along a single axis, stopping at time of impact with first collider in its path.
+    Colliders box already overlaps are ignored so it can always move out of them.
+    Returns tuple of distance box can move and collider it stops against, or None if nothing was hit.
+
+    Args:
+        position (pygame.Vector2): Level space top left of box (required).
+        size (tuple): Width and height of box (required).
+        delta (float): Distance to move box along axis, negative to move left or up (required).
+        axis (int): 0 to move along x, 1 to move along y (required).
+        world (CollisionWorld): Colliders box can't pass through (required).
+        layers (int): Bitmask of layers box can't pass through.
+    """
+    if delta == 0:
+        return 0, None
+    other = 1 - axis
+    start, end = position[axis], position[axis] + size[axis]
+
+    # Only colliders within area box passes through can be hit
+    swept = [position[0], position[1], position[0] + size[0], position[1] + size[1]]
+    if delta > 0:
+        swept[axis+2] += delta
+    else:
+        swept[axis] += delta
+    left, top = math.floor(swept[0]), math.floor(swept[1])
+    area = pygame.Rect(left, top, math.ceil(swept[2]) - left, math.ceil(swept[3]) - top)
+
+    hit = None
+    for collider in (overlap.rect for overlap in world.query(area, layers)):
+        near, far = (collider.left, collider.right) if axis == 0 else (collider.top, collider.bottom)
+        other_near, other_far = (collider.left, collider.right) if other == 0 else (collider.top, collider.bottom)
+        # Colliders which are only touched along the other axis are slid past
+        if not (position[other] < other_far - TOUCH_EPSILON and position[other] + size[other] > other_near + TOUCH_EPSILON):
+            continue
+        if delta > 0 and end <= near + TOUCH_EPSILON and end + delta > near:
+            delta, hit = max(near - end, 0), collider
+        elif delta < 0 and start >= far - TOUCH_EPSILON and start + delta < far:
+            delta, hit = min(far - start, 0), collider
+    return delta, hit
+
+def move(position, offset, size, movement, world, layers=SOLID):
+    """ Moves position along x then y, stopping each axis at time of impact of box at offset from position with colliders.
+    Returns tuple of whether horizontal and vertical movement were stopped by a collider.
+
+    Args:
+        position (pygame.Vector2): Level space position which is moved in place (required).
+        offset (pygame.Vector2): Offset of box's top left from position (required).
+        size (tuple): Width and height of box (required).
+        movement (pygame.Vector2): Distance to move along each axis (required).
+        world (CollisionWorld): Colliders box can't pass through (required).
+        layers (int): Bitmask of layers box can't pass through.
+    """
+    movement_x, hit_x = sweep_axis(position + offset, size, movement.x, 0, world, layers)
+    position.x += movement_x
+    movement_y, hit_y = sweep_axis(position + offset, size, movement.y, 1, world, layers)
+    position.y += movement_y
+    return not hit_x == None, not hit_y == None
+
+class TileGrid():
+    """ Grid of tiles storing one byte per tile of whether rectangles cover it completely, partially or not at all.
+    Queries index tiles directly, only testing rectangles of partially covered tiles, so cost doesn't grow with number of rectangles.
+
+    Args:
+        rects ([pygame.Rect]): Rectangles to rasterise, must not be moved afterwards (required).
+        tile_size (int): Width and height of each tile in level pixels.
+    """
+    EMPTY = 0
+    FULL = 1
+    PARTIAL = 2
+
+    def __init__(self, rects, tile_size=16):
+        self.tile_size = tile_size
+        # Rectangles with no area can never collide so aren't rasterised
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        self.left = min([rect.left // tile_size for rect in rects] + [0])
+        self.top = min([rect.top // tile_size for rect in rects] + [0])
+        self.width = max([(rect.right - 1) // tile_size + 1 for rect in rects] + [0]) - self.left
+        self.height = max([(rect.bottom - 1) // tile_size + 1 for rect in rects] + [0]) - self.top
+        self.tiles = bytearray(self.width * self.height)
+        # Lists of rectangles keyed by index of partially covered tiles
+        self.partial = {}
+
+        for rect in rects:
+            for y in range(rect.top // tile_size, (rect.bottom - 1) // tile_size + 1):
+                for x in range(rect.left // tile_size, (rect.right - 1) // tile_size + 1):
+                    index = (y - self.top) * self.width + x - self.left
+                    if self.tiles[index] == TileGrid.FULL:
+                        continue
+                    if rect.contains(pygame.Rect(x * tile_size, y * tile_size, tile_size, tile_size)):
+                        self.tiles[index] = TileGrid.FULL
+                        self.partial.pop(index, None)
+                    else:
+                        self.tiles[index] = TileGrid.PARTIAL
+                        self.partial.setdefault(index, []).append(rect)
+
+    def collides_point(self, x, y):
+        """ Returns whether point is within any rectangle.
+
+        Args:
+            x (int): Level space x coordinate (required).
+            y (int): Level space y coordinate (required).
+        """
+        column, row = x // self.tile_size - self.left, y // self.tile_size - self.top
+        if column < 0 or row < 0 or column >= self.width or row >= self.height:
+            return False
+        index = row * self.width + column
+        if self.tiles[index] == TileGrid.PARTIAL:
+            return any(rect.collidepoint(x, y) for rect in self.partial[index])
+        return self.tiles[index] == TileGrid.FULL
+
+    def collides(self, rect):
+        """ Returns whether any rectangle overlaps rect, as with pygame.Rect.collidelist.
+
+        Args:
+            rect (pygame.Rect): Level space rectangle (required).
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        # Right and bottom edges are exclusive, and tiles outside grid are empty
+        columns = range(max(rect.left // self.tile_size - self.left, 0), min((rect.right - 1) // self.tile_size + 1 - self.left, self.width))
+        for row in range(max(rect.top // self.tile_size - self.top, 0), min((rect.bottom - 1) // self.tile_size + 1 - self.top, self.height)):
+            for column in columns:
+                index = row * self.width + column
+                if self.tiles[index] == TileGrid.FULL:
+                    return True
+                if self.tiles[index] == TileGrid.PARTIAL and not rect.collidelist(self.partial[index]) == -1:
+                    return True
+        return False
+
+class CoverageGrid():
+    """ Grid of cells between every edge of a set of rectangles, with each cell either completely covered by the rectangles or not at all.
+
+    Args:
+        rects ([pygame.Rect]): Rectangles with area, defining which cells are covered (required).
+    """
+    def __init__(self, rects):
+        self.xs = sorted({rect.left for rect in rects} | {rect.right for rect in rects})
+        self.ys = sorted({rect.top for rect in rects} | {rect.bottom for rect in rects})
+        self.x_indices = {x: i for i, x in enumerate(self.xs)}
+        self.y_indices = {y: i for i, y in enumerate(self.ys)}
+        self.columns, self.rows = len(self.xs)-1, len(self.ys)-1
+        self.covered = [[False] * self.columns for _ in range(self.rows)]
+        for rect in rects:
+            row0, row1, column0, column1 = self.get_cells(rect)
+            for row in range(row0, row1):
+                for column in range(column0, column1):
+                    self.covered[row][column] = True
+
+        # Summed area table so coverage of any block of cells is checked in constant time
+        self.sums = [[0] * (self.columns+1) for _ in range(self.rows+1)]
+        for row in range(self.rows):
+            for column in range(self.columns):
+                self.sums[row+1][column+1] = self.covered[row][column] + self.sums[row][column+1] + self.sums[row+1][column] - self.sums[row][column]
+
+    def get_cells(self, rect):
+        """ Returns first and last row and column, exclusive, of cells within rect whose edges lie on grid.
+
+        Args:
+            rect (pygame.Rect): Rectangle with edges on grid (required).
+        """
+        return self.y_indices[rect.top], self.y_indices[rect.bottom], self.x_indices[rect.left], self.x_indices[rect.right]
+
+    def is_covered(self, row0, row1, column0, column1):
+        """ Returns whether every cell within block is covered, last row and column exclusive """
+        if row0 < 0 or column0 < 0 or row1 > self.rows or column1 > self.columns:
+            return False
+        count = self.sums[row1][column1] - self.sums[row0][column1] - self.sums[row1][column0] + self.sums[row0][column0]
+        return count == (row1-row0) * (column1-column0)
+
+    def grow(self, row0, row1, column0, column1, horizontal_first=True):
+        """ Grows block of covered cells in each direction until it can't grow without including uncovered cells.
+        Returns grown block as first and last row and column, exclusive.
+
+        Args:
+            row0, row1, column0, column1 (int): Block of covered cells to grow (required).
+            horizontal_first (bool): Whether block grows left and right before growing up and down.
+        """
+        # Each step grows one edge outwards by one cell
+        horizontal = ((0, 0, -1, 0), (0, 0, 0, 1))
+        vertical = ((-1, 0, 0, 0), (0, 1, 0, 0))
+        for steps in (horizontal, vertical) if horizontal_first else (vertical, horizontal):
+            for step in steps:
+                while self.is_covered(row0+step[0], row1+step[1], column0+step[2], column1+step[3]):
+                    row0, row1, column0, column1 = row0+step[0], row1+step[1], column0+step[2], column1+step[3]
+        return row0, row1, column0, column1
+
+    def get_rect(self, row0, row1, column0, column1):
+        """ Returns pygame.Rect of block of cells, last row and column exclusive """
+        return pygame.Rect(self.xs[column0], self.ys[row0], self.xs[column1]-self.xs[column0], self.ys[row1]-self.ys[row0])
+
+def merge_rects(rects):
+    """ Merges adjacent and overlapping rectangles into as few larger rectangles as it can find, covering exactly the same area.
+    Merged rectangles may overlap, as authored colliders already do. Returns copies of rectangles if merging doesn't reduce their number.
+    Returns list of pygame.Rect.
+
+    Args:
+        rects ([pygame.Rect]): Rectangles to merge (required).
+    """
+    # Rectangles with no area never collide
+    rects = [pygame.Rect(rect) for rect in rects if rect.width > 0 and rect.height > 0]
+    if len(rects) <= 1:
+        return rects
+    grid = CoverageGrid(rects)
+
+    # Candidates are each rectangle grown as large as possible within covered area, every covered cell lies in at least one
+    candidates = []
+    for rect in rects:
+        for horizontal_first in (True, False):
+            block = grid.grow(*grid.get_cells(rect), horizontal_first=horizontal_first)
+            if not block in candidates:
+                candidates.append(block)
+    cells = [{(row, column) for row in range(block[0], block[1]) for column in range(block[2], block[3])} for block in candidates]
+    area = lambda cell: (grid.ys[cell[0]+1]-grid.ys[cell[0]]) * (grid.xs[cell[1]+1]-grid.xs[cell[1]])
+
+    # Greedily choose candidate covering most remaining area until everything is covered
+    # Remaining area of a candidate only ever shrinks, so stale gains in the heap are recomputed only when popped
+    uncovered = set().union(*cells)
+    heap = [(-sum(area(cell) for cell in cells[i]), i) for i in range(len(candidates))]
+    heapq.heapify(heap)
+    chosen = []
+    while len(uncovered) > 0:
+        _, i = heapq.heappop(heap)
+        gain = sum(area(cell) for cell in cells[i] & uncovered)
+        if len(heap) > 0 and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, i))
+            continue
+        chosen.append(i)
+        uncovered -= cells[i]
+
+    # Drop chosen candidates made redundant by those chosen after them
+    counts = {}
+    for i in chosen:
+        for cell in cells[i]:
+            counts[cell] = counts.get(cell, 0) + 1
+    for i in reversed(chosen[:]):
+        if all(counts[cell] > 1 for cell in cells[i]):
+            chosen.remove(i)
+            for cell in cells[i]:
+                counts[cell] -= 1
+
+    if len(chosen) >= len(rects):
+        return rects
+    return sorted((grid.get_rect(*candidates[i]) for i in chosen), key=lambda rect: (rect.top, rect.left))
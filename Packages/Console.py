@@ -34,4 +34,16 @@ class Console:
                 'display_lines' : 20,
                 'display_columns' : 100
                 }
-            })
\ No newline at end of file
+            })
+
+    def dump_profile(self, filename=None, frames=None):
+        """ Writes recorded frame stage timings to csv.
+
+        Args:
+            filename (str): Path of csv file, defaults to Settings.PROFILE_DUMP_FILENAME.
+            frames (int): Number of most recent frames to write, defaults to all recorded frames.
+        """
+        if filename == None:
+            filename = Settings.PROFILE_DUMP_FILENAME
+        Settings.profiler.dump_csv(filename, frames)
+        return filename
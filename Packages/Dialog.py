@@ -20,9 +20,10 @@ class Dialog():
         self.spn = save_progress_name
 
         self.pages = pages
-        # Start by setting box to first page
-        self.__construct_box(pages[0])
         self.page_index = 0
+        # Text box is built on first page when player nears collider, most dialogs are never triggered
+        self.template = Template(pages[0])
+        self.dialog_box = None
 
         self.dialog_group = pygame.sprite.LayeredDirty()
 
@@ -55,12 +56,18 @@ class Dialog():
         self.dialog_box.set_indicator()
         self.dialog_box.set_portrait(Settings.SRC_DIRECTORY+"UI/Animations/player_portrait.png", (64, 64))
 
+    def warm(self):
+        """ Builds text box for current page if not already built, so activating doesn't stall """
+        if self.dialog_box == None:
+            self.__construct_box(self.pages[self.page_index])
+
     def activate(self, player_name=""):
         """ Activates text box to be displayed 
         
         Args:
             player_name (str): Name to substitute into template strings.
         """
+        self.warm()
         # Add to display group if not already in it
         if not self.dialog_group:
             self.dialog_group.add(self.dialog_box)
@@ -83,6 +90,10 @@ class Dialog():
             player_collider (pygame.Rect): Rectangle collider describing player (required).
             player_name (str): Name to substitute into dialog template strings.
         """
+        # Build text box ahead of time once player is close enough to trigger it soon
+        if not self.has_activated and self.dialog_box == None and self.collider.inflate(Settings.DIALOG_WARM_DISTANCE*2, Settings.DIALOG_WARM_DISTANCE*2).colliderect(player_collider):
+            self.warm()
+
         # Only activate if not already active, hasn't been activated in this playthrough and not saved as completed
         if not self.has_activated and self.collider.colliderect(player_collider) and (
             (self.spn not in level.save_dialog_completion) or (
@@ -133,9 +144,13 @@ class Dialog():
             self.dialog_box.update()
 
     def render(self, surface):
-        """ Draws dialog to surface if active
+        """ Draws dialog to surface if active.
+        Returns list of dirty rects which have been rendered to.
 
             Args:
                 surface (pygame.Surface): Surface to render to in gui space (required).
         """
         self.dialog_group.draw(surface)
+        if self.dialog_group:
+            return [self.dialog_box.rect]
+        return []
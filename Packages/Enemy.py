@@ -1,7 +1,7 @@
 import pygame, copy, random, math
 
 # For debugging
-from Packages import Sprite, Settings
+from Packages import Sprite, Settings, Collision
 
 class Enemy(Sprite.AnimatedSprite):
     """ Standard patrolling enemy which attempts to attack player. Inherits from Sprite.AnimatedSprite.
@@ -68,6 +68,8 @@ class Enemy(Sprite.AnimatedSprite):
 
         # Setup state machine, expects: "patrol", "alert", "idle", "attack", "wait", "death", "dead"
         self.state = "patrol"
+        # Colliders in level's collision world, added when enemy is spawned
+        self.collision_entries = []
 
         if "spritesheet_json_filename" in kwargs:
             self.play_animation("walk", loop=True)
@@ -137,99 +139,128 @@ class Enemy(Sprite.AnimatedSprite):
                 self.state = "patrol"
                 self.play_animation("unlevel_spear", on_animation_end=lambda self: self.play_animation("walk", loop=True))
 
-    def physics_process(self, delta, colliders = None, player_position=None, attack_colliders=None):
+    def physics_process(self, delta, world=None, player_position=None, attack_colliders=None):
         """ Calculates physics and handles animations for enemy, doesn't update state machine except during death.
         Returns True if enemy was hit by player else False
         
         Args:
             delta (float): Constant physics tick, eg. 1 / fps (required).
-            colliders ([pygame.Rect]): List of rectangles describing the levels physical colliders. 
+            world (Collision.CollisionWorld): Collision world of level, enemy can't pass through its solid colliders. 
             player_position (pygame.Vector2): Level space position of player used to face enemy towards player.
             attack_colliders ([pygame.Rect]): List of rectangles which will damage an enemy, eg. list of player attack colliders. 
         """
         is_damaged = False
+        if self.begin_physics(delta, player_position):
+            # Apply velocities using dx = v * dt, moving along each axis until touching a collider
+            hit_x, hit_y = False, False
+            if not world == None:
+                hit_x, hit_y = Collision.move(self.position, self.collider_offset, self.collider.size, self.velocity * delta, world)
+            else:
+                self.position += self.velocity * delta
+            is_damaged = self.end_physics(world, player_position, attack_colliders, hit_x, hit_y)
+        self.update_colliders()
+        return is_damaged
 
-        if not self.state == "death" and not self.state == "dead":
-            # Handle gaps between attacks by updating timer when valid
-            if self.attack_gap_time < self.attack_gap:
-                self.attack_gap_time += delta
-                if self.attack_gap_time >= self.attack_gap:
-                    # Enter alert state where enemy can now attack
-                    self.state = "alert"
+    def begin_physics(self, delta, player_position=None):
+        """ Updates velocity of enemy before it moves, split from physics_process so many enemies can be moved at once.
+        Returns False if enemy is dying and shouldn't move.
 
-            if self.state == "patrol":
-                # Continue moving in direction facing when patrolling, reset horizontal velocity
-                self.velocity.x = ((not self.flipX)*2 - 1)*self.walk_speed
-            else:
-                self.velocity.x = 0
-                if self.animation_name == "walk":
-                        self.play_animation("idle", loop=True)
+        Args:
+            delta (float): Constant physics tick, eg. 1 / fps (required).
+            player_position (pygame.Vector2): Level space position of player used to face enemy towards player.
+        """
+        if self.state == "death" or self.state == "dead":
+            return False
+
+        # Handle gaps between attacks by updating timer when valid
+        if self.attack_gap_time < self.attack_gap:
+            self.attack_gap_time += delta
+            if self.attack_gap_time >= self.attack_gap:
+                # Enter alert state where enemy can now attack
+                self.state = "alert"
 
-                # Make sure entity is facing the correct direction, but dont switch during attacks
-                if not self.state == "attack": 
-                    self.flipX = (player_position - pygame.Vector2(self.collider.center)).x < 0
+        if self.state == "patrol":
+            # Continue moving in direction facing when patrolling, reset horizontal velocity
+            self.velocity.x = ((not self.flipX)*2 - 1)*self.walk_speed
+        else:
+            self.velocity.x = 0
+            if self.animation_name == "walk":
+                    self.play_animation("idle", loop=True)
 
-            # Apply constant gravitational acceleration using dv = a * dt
-            self.velocity += delta * self.gravity
+            # Make sure entity is facing the correct direction, but dont switch during attacks
+            if not self.state == "attack": 
+                self.flipX = (player_position - pygame.Vector2(self.collider.center)).x < 0
 
-            # Apply velocities using dx = v * dt
-            self.position += self.velocity * delta
+        # Apply constant gravitational acceleration using dv = a * dt
+        self.velocity += delta * self.gravity
+        return True
 
-            # Adjust collider positions after position change
-            self.collider.topleft = (self.position + self.collider_offset).xy
-            self.weapons_collider_flip.topleft = (self.position + self.weapons_collider_offset).xy
-            self.weapons_collider.x = self.position.x + self.weapons_collider_offset.x + self.collider_size.x + self.weapons_collider_size.x
-            self.weapons_collider.y = self.position.y + self.weapons_collider_offset.y
-
-            # Check for damage events if not already dying
-            if not attack_colliders == None:
-                collision = self.collider.collidelist(attack_colliders)
-                if not collision == -1:
-                    # Play death animation then actually delete object
-                    self.play_animation("death", 
-                        on_animation_end=lambda self: self.update_state(state="dead"), 
-                        on_animation_interrupt=lambda self: self.update_state(state="dead")
-                    )
-                    Settings.SOUND_EFFECTS["enemy_death"].Play()
-                    self.state = "death"
-                    is_damaged = True
-
-            if not colliders == None:
-                for collider in colliders:
-                    if self.collider.colliderect(collider):
-                        # Use simple collision system which minimizes tranformations since enemies have low velocities
-                        push_y = min(
-                            # Consider moving down; Hit the top side
-                            collider.top - self.collider.height - self.collider_offset.y - self.position.y+1,
-                            # Consider moving up; Hit the bottom side
-                            collider.bottom - self.collider_offset.y - self.position.y,
-                            key=abs
-                        )
-                        push_x = min(
-                            # Consider moving right; Hit the left side
-                            collider.left - self.collider.width - self.collider_offset.x - self.position.x,
-                            # Consider moving left; Hit the right side
-                            collider.right - self.collider_offset.x - self.position.x,
-                            key=abs
-                        )
-
-                        # Check how close entity is to edge
-                        if abs(push_x) < self.platform_edge_distance:
-                            # Switch direction
-                            if push_x > 0:
-                                self.flipX = True
-                            else:
-                                self.flipX = False
-
-                        # Choose smaller transformation
-                        if abs(push_x) < abs(push_y):
-                            self.position.x = push_x + self.position.x
-                            # Horizontal velocity is reset every physic tick anyway
-                        else:
-                            self.position.y = push_y + self.position.y
-                            self.velocity.y = 0
+    def end_physics(self, world, player_position, attack_colliders, hit_x, hit_y):
+        """ Responds to collisions of enemy after it has moved and checks for damage.
+        Returns True if enemy was hit by player else False
+
+        Args:
+            world (Collision.CollisionWorld): Collision world of level, used to find ends of platforms (required).
+            player_position (pygame.Vector2): Level space position of player (required).
+            attack_colliders ([pygame.Rect]): List of rectangles which will damage an enemy (required).
+            hit_x (bool): Whether horizontal movement was stopped by a collider (required).
+            hit_y (bool): Whether vertical movement was stopped by a collider (required).
+        """
+        is_damaged = False
+        if hit_x and self.state == "patrol":
+            # Turn around at walls, horizontal velocity is reset every physic tick anyway
+            self.flipX = self.velocity.x > 0
+        is_on_ground = hit_y and self.velocity.y > 0
+        if hit_y:
+            self.velocity.y = 0
+
+        # Adjust collider positions after position change
+        self.collider.topleft = (self.position + self.collider_offset).xy
+        self.weapons_collider_flip.topleft = (self.position + self.weapons_collider_offset).xy
+        self.weapons_collider.x = self.position.x + self.weapons_collider_offset.x + self.collider_size.x + self.weapons_collider_size.x
+        self.weapons_collider.y = self.position.y + self.weapons_collider_offset.y
+
+        # Turn around once floor ends within platform edge distance of far side of collider
+        if is_on_ground:
+            bottom = int(self.position.y + self.collider_offset.y + self.collider.height)
+            if not world.probe_solid(pygame.Rect(self.position.x + self.collider_offset.x + self.platform_edge_distance, bottom, 1, 1)):
+                self.flipX = True
+            elif not world.probe_solid(pygame.Rect(self.position.x + self.collider_offset.x + self.collider.width - self.platform_edge_distance, bottom, 1, 1)):
+                self.flipX = False
+
+        # Check for damage events if not already dying
+        if not attack_colliders == None:
+            collision = self.collider.collidelist(attack_colliders)
+            if not collision == -1:
+                # Play death animation then actually delete object
+                self.play_animation("death", 
+                    on_animation_end=lambda self: self.update_state(state="dead"), 
+                    on_animation_interrupt=lambda self: self.update_state(state="dead")
+                )
+                Settings.SOUND_EFFECTS["enemy_death"].Play()
+                self.state = "death"
+                is_damaged = True
         return is_damaged
-                    
+
+    def add_colliders(self, world):
+        """ Adds enemy and attack colliders to collision world, where they follow enemy as it moves.
+
+        Args:
+            world (Collision.CollisionWorld): Collision world of level (required).
+        """
+        self.collision_entries = [
+            world.add_dynamic(self.collider, Collision.ENEMY, self),
+            world.add_dynamic(self.weapons_collider, Collision.ENEMY_WEAPON, self),
+            world.add_dynamic(self.weapons_collider_flip, Collision.ENEMY_WEAPON, self),
+        ]
+        self.update_colliders()
+
+    def update_colliders(self):
+        """ Enables only colliders in collision world which currently damage player, as returned by get_damage_colliders """
+        damage_colliders = self.get_damage_colliders()
+        for collider in self.collision_entries:
+            collider.enabled = any(collider.rect is rect for rect in damage_colliders)
+
     def get_damage_colliders(self):
         """ Returns a list of pygame.Rects which represent the enemies attack hitboxes"""
 
@@ -253,7 +284,9 @@ class Enemy(Sprite.AnimatedSprite):
         """ Standard copy constructor for complex objects """
         copyobj = Enemy()
         for name, attr in self.__dict__.items():
-            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+            if name in self.SHARED_ATTRIBUTES:
+                copyobj.__dict__[name] = attr
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
                 copyobj.__dict__[name] = attr.copy()
             else:
                 copyobj.__dict__[name] = copy.deepcopy(attr)
@@ -303,6 +336,8 @@ class FlyingEnemy(Sprite.AnimatedSprite):
         self.max_drift_distance = kwargs.get("max_drift_distance", 10)
         self.alert_distance = kwargs.get("alert_distance", 100)
         self.state = "idle"
+        # Colliders in level's collision world, added when enemy is spawned
+        self.collision_entries = []
 
         if "spritesheet_json_filename" in kwargs:
             self.play_animation("fly", loop=True)
@@ -342,109 +377,126 @@ class FlyingEnemy(Sprite.AnimatedSprite):
                 # When returning to idle reset og position
                 self.og_position = self.position
 
-    def physics_process(self, delta, colliders = None, player_position=None, attack_colliders=None):
+    def physics_process(self, delta, world=None, player_position=None, attack_colliders=None):
         """ Handles physics, animations and updates state for flying enemy.
 
         Args:
             delta (float): Constant physics tick, eg. 1 / fps (required).
-            colliders ([pygame.Rect]): List of rectangles describing the levels physical colliders. 
+            world (Collision.CollisionWorld): Collision world of level, enemy can't pass through its solid colliders. 
             player_position (pygame.Vector2): Level space position of player used to face enemy towards player.
             attack_colliders ([pygame.Rect]): List of rectangles which will damage an enemy, eg. list of player attack colliders. 
         """
         is_damaged = False
+        if self.begin_physics(delta, player_position):
+            # Apply velocities using dx = v * dt, moving along each axis until touching a collider
+            hit_x, hit_y = False, False
+            if not world == None:
+                hit_x, hit_y = Collision.move(self.position, self.collider_offset, self.collider.size, self.velocity * delta, world)
+            else:
+                self.position += self.velocity * delta
+            is_damaged = self.end_physics(world, player_position, attack_colliders, hit_x, hit_y)
+        self.update_colliders()
+        return is_damaged
 
+    def begin_physics(self, delta, player_position=None):
+        """ Updates velocity of flying enemy before it moves, split from physics_process so many enemies can be moved at once.
+        Returns False if enemy is dying and shouldn't move.
+
+        Args:
+            delta (float): Constant physics tick, eg. 1 / fps (required).
+            player_position (pygame.Vector2): Level space position of player.
+        """
         # Face direction of velocity
         self.flipX = self.velocity.x < 0
 
         # Handle updating velocity when not dying
-        if not (self.state == "death" or self.state == "dead"):
-            if self.state == "alert":
-                # Still add random velocity when attacking to have very rudimentary path finding and increase likelyhood of missing player
-                rand_vel_x = random.uniform(-self.drift_acceleration, self.drift_acceleration)
-                rand_vel_y = random.uniform(-self.drift_acceleration, self.drift_acceleration)
-                self.velocity += pygame.Vector2(rand_vel_x, rand_vel_y)
-                
-                # Get direction vector to player and accelerate towards it
-                if (self.attack_position - pygame.Vector2(self.collider.center)).length() > 0:
-                    self.velocity += pygame.Vector2(self.attack_position - pygame.Vector2(self.collider.center)).normalize() * self.attack_acceleration
-
-                # Limit velocity to max speed
-                if self.velocity.length() > self.max_attack_speed:
-                    self.velocity = self.velocity.scale_to_length(self.max_attack_speed)
-            else:
-                # Add random velocity
-                self.velocity += pygame.Vector2(
-                    random.uniform(-self.drift_acceleration, self.drift_acceleration), 
-                    random.uniform(-self.drift_acceleration, self.drift_acceleration)
+        if self.state == "death" or self.state == "dead":
+            return False
+
+        if self.state == "alert":
+            # Still add random velocity when attacking to have very rudimentary path finding and increase likelyhood of missing player
+            rand_vel_x = random.uniform(-self.drift_acceleration, self.drift_acceleration)
+            rand_vel_y = random.uniform(-self.drift_acceleration, self.drift_acceleration)
+            self.velocity += pygame.Vector2(rand_vel_x, rand_vel_y)
+            
+            # Get direction vector to player and accelerate towards it
+            if (self.attack_position - pygame.Vector2(self.collider.center)).length() > 0:
+                self.velocity += pygame.Vector2(self.attack_position - pygame.Vector2(self.collider.center)).normalize() * self.attack_acceleration
+
+            # Limit velocity to max speed
+            if self.velocity.length() > self.max_attack_speed:
+                self.velocity = self.velocity.scale_to_length(self.max_attack_speed)
+        else:
+            # Add random velocity
+            self.velocity += pygame.Vector2(
+                random.uniform(-self.drift_acceleration, self.drift_acceleration), 
+                random.uniform(-self.drift_acceleration, self.drift_acceleration)
+            )
+
+            # If move beyond max drift distance reflect velocity off of tangent
+            if (self.position - self.og_position).length() >= self.max_drift_distance:
+                self.velocity.reflect_ip(self.position - self.og_position)
+                self.velocity /= 2
+
+            # Limit velocity to max speed
+            if self.velocity.length() > self.max_speed:
+                self.velocity = self.velocity.normalize()*self.max_speed
+        return True
+
+    def end_physics(self, world, player_position, attack_colliders, hit_x, hit_y):
+        """ Responds to collisions of flying enemy after it has moved, checks for damage and updates state.
+        Returns True if enemy was hit by player else False
+
+        Args:
+            world (Collision.CollisionWorld): Collision world of level (required).
+            player_position (pygame.Vector2): Level space position of player used to alert enemy (required).
+            attack_colliders ([pygame.Rect]): List of rectangles which will damage an enemy (required).
+            hit_x (bool): Whether horizontal movement was stopped by a collider (required).
+            hit_y (bool): Whether vertical movement was stopped by a collider (required).
+        """
+        # Reflect about surface if collision occurs, losing some velocity
+        if hit_x:
+            self.velocity.x = -self.velocity.x / 2
+        if hit_y:
+            self.velocity.y = -self.velocity.y / 2
+
+        # Move collider to new position
+        self.collider.topleft = (self.position + self.collider_offset).xy
+
+        # Check for damage events
+        is_damaged = False
+        if not attack_colliders == None:
+            generous_collider = self.collider.inflate(1.2,1.2)
+            collision = generous_collider.collidelist(attack_colliders)
+            if not collision == -1:
+                # Kill enemy if damaged by setting state to dead
+                self.play_animation("death", 
+                    on_animation_end=lambda self: self.update_state(state="dead"), 
+                    on_animation_interrupt=lambda self: self.update_state(state="dead")
                 )
+                # Set into transition state while death animation playing and set flag
+                self.state = "death"
+                is_damaged = True
 
-                # If move beyond max drift distance reflect velocity off of tangent
-                if (self.position - self.og_position).length() >= self.max_drift_distance:
-                    self.velocity.reflect_ip(self.position - self.og_position)
-                    self.velocity /= 2
+                Settings.SOUND_EFFECTS["enemy_death"].Play()
+        self.update_state(player_position)
+        return is_damaged
 
-                # Limit velocity to max speed
-                if self.velocity.length() > self.max_speed:
-                    self.velocity = self.velocity.normalize()*self.max_speed
+    def add_colliders(self, world):
+        """ Adds enemy collider to collision world, where it follows enemy as it moves.
 
-            # Apply velocities using dx = v * dt
-            self.position += self.velocity * delta
+        Args:
+            world (Collision.CollisionWorld): Collision world of level (required).
+        """
+        self.collision_entries = [world.add_dynamic(self.collider, Collision.ENEMY, self)]
+        self.update_colliders()
 
-            # Move collider to new position
-            self.collider.topleft = (self.position + self.collider_offset).xy
+    def update_colliders(self):
+        """ Enables collider in collision world only while it damages player, as returned by get_damage_colliders """
+        damage_colliders = self.get_damage_colliders()
+        for collider in self.collision_entries:
+            collider.enabled = any(collider.rect is rect for rect in damage_colliders)
 
-            # Check for damage events
-            is_damaged = False
-            if not attack_colliders == None:
-                generous_collider = self.collider.inflate(1.2,1.2)
-                collision = generous_collider.collidelist(attack_colliders)
-                if not collision == -1:
-                    # Kill enemy if damaged by setting state to dead
-                    self.play_animation("death", 
-                        on_animation_end=lambda self: self.update_state(state="dead"), 
-                        on_animation_interrupt=lambda self: self.update_state(state="dead")
-                    )
-                    # Set into transition state while death animation playing and set flag
-                    self.state = "death"
-                    is_damaged = True
-
-                    Settings.SOUND_EFFECTS["enemy_death"].Play()
-
-            if not colliders == None:
-                for collider in colliders:
-                    if self.collider.colliderect(collider):
-                        # Mininmise all translations
-                        push_y = min(
-                            # Consider moving down; Hit the top side
-                            collider.top - self.collider.height - self.collider_offset.y - self.position.y+1,
-                            # Consider moving up; Hit the bottom side
-                            collider.bottom - self.collider_offset.y - self.position.y,
-                            key=abs
-                        )
-                        push_x = min(
-                            # Consider moving right; Hit the left side
-                            collider.left - self.collider.width - self.collider_offset.x - self.position.x,
-                            # Consider moving left; Hit the right side
-                            collider.right - self.collider_offset.x - self.position.x,
-                            key=abs
-                        )
-
-                        # Choose smaller transformation and reflect about surface if collision occurs, losing some velocity
-                        if abs(push_x) < abs(push_y):
-                            self.position.x = push_x + self.position.x
-                            if push_x > 0:
-                                self.velocity.x = abs(self.velocity.x) / 2
-                            else:
-                                self.velocity.x = -abs(self.velocity.x) / 2
-                        else:
-                            self.position.y = push_y + self.position.y
-                            if push_y > 0:
-                                self.velocity.y = abs(self.velocity.y) / 2
-                            else:
-                                self.velocity.y = -abs(self.velocity.y) / 2
-            self.update_state(player_position)
-        return is_damaged
-                    
     def get_damage_colliders(self):
         """ Returns a list of pygame.Rects which represent the enemies attack hitboxes """
         # Has no attacks so just return collider if not dying
@@ -457,7 +509,9 @@ class FlyingEnemy(Sprite.AnimatedSprite):
         """ Standard copy constructor for complex objects """
         copyobj = FlyingEnemy()
         for name, attr in self.__dict__.items():
-            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+            if name in self.SHARED_ATTRIBUTES:
+                copyobj.__dict__[name] = attr
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
                 copyobj.__dict__[name] = attr.copy()
             else:
                 copyobj.__dict__[name] = copy.deepcopy(attr)
@@ -555,7 +609,9 @@ class ChallengeCollectable(Sprite.AnimatedSprite):
         """ Standard copy constructor for complex objects """
         copyobj = ChallengeCollectable()
         for name, attr in self.__dict__.items():
-            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+            if name in self.SHARED_ATTRIBUTES:
+                copyobj.__dict__[name] = attr
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
                 copyobj.__dict__[name] = attr.copy()
             else:
                 copyobj.__dict__[name] = copy.deepcopy(attr)
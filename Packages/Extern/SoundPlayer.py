@@ -1,17 +1,29 @@
 # Based on: https://github.com/steveway/papagayo-ng/blob/working_vol/SoundPlayer.py
 # Removed alternate audio interface and added ability to play same sound multiple times simultaneous
 
-import os, traceback, pyaudio, threading
+import os, traceback, threading
+
+# PyAudio is only needed to play sounds, so running with null audio doesn't require it
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
 
 from Packages import Settings
 from pydub import AudioSegment
 from pydub.utils import make_chunks
     
+def decode(soundfile):
+    """ Decodes sound file into audio segment, safe to run on a loading thread """
+    return AudioSegment.from_file(soundfile, format=os.path.splitext(soundfile)[1][1:])
+
 class SoundPlayer:
-    def __init__(self, soundfile=None):
+    def __init__(self, soundfile=None, pydubfile=None):
         self.soundfile = soundfile
         self.isplaying = False
         self.time = 0  # current audio position in frames
+        if pyaudio == None:
+            raise ImportError("pyaudio is required to play sounds, run with null audio instead")
         self.audio = pyaudio.PyAudio()
         self.pydubfile = None
         self.volume = 100
@@ -23,7 +35,8 @@ class SoundPlayer:
             try:
                 if Settings.DEBUG:
                     print(self.soundfile)
-                self.pydubfile = AudioSegment.from_file(self.soundfile, format=os.path.splitext(self.soundfile)[1][1:])
+                # Use audio already decoded by preloader if given
+                self.pydubfile = pydubfile if not pydubfile == None else decode(self.soundfile)
 
                 self.isvalid = True
 
@@ -152,4 +165,39 @@ class SoundPlayer:
         if not self.thread == None:
             self.Stop()
             self.thread.join()
-        return {"soundfile":self.soundfile,"volume":self.volume, "pydubfile":self.pydubfile}
\ No newline at end of file
+        return {"soundfile":self.soundfile,"volume":self.volume, "pydubfile":self.pydubfile}
+
+
+class NullSoundPlayer:
+    """ Silent stand in for SoundPlayer with the same interface, used when running without an audio device eg. benchmarks """
+    def __init__(self, soundfile=None):
+        self.soundfile = soundfile
+        self.volume = 100
+        self.isvalid = False
+
+    def IsValid(self):
+        return self.isvalid
+
+    def Duration(self):
+        return 0
+
+    def IsPlaying(self):
+        return False
+
+    def SetCurTime(self, time):
+        pass
+
+    def Stop(self, fade_out_ms:int=0):
+        pass
+
+    def CurrentTime(self):
+        return 0
+
+    def SetVolume(self, volume):
+        self.volume = volume
+
+    def Play(self, loops=1, fade_in_ms=0):
+        pass
+
+    def PlaySegment(self, start, length):
+        pass
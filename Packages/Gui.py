@@ -450,13 +450,13 @@ class Gui():
             health_crop = 0
         else:
             health_crop = 16 + int(42*health_fraction)
-        self.health_bar.render(surface, (10, 10),
+        dirty_rects += self.health_bar.render(surface, (10, 10),
                                size=(0, 0, health_crop*2, 17*2), delta=delta)
         
         # Crop extra health by different amount to show each extra life
         if health_fraction > 1:
             health_crop = 16 + int(7 * (player.hearts - Settings.PLAYER_HEARTS))
-            self.alt_health_bar.render(surface, (10, 6),
+            dirty_rects += self.alt_health_bar.render(surface, (10, 6),
                                 size=(0, 0, health_crop*2, 17*2), delta=delta)
         
         # Display outline for each extra life unlocked even if unfilled
@@ -663,18 +663,27 @@ class Gui():
 
     def render(self, surface, delta):
         """ Draw sprites associated with gui to surface. Lies under gui elements.
+        Returns list of dirty rectangles which have been rendered to.
 
         Args:
             surface (pygame.Surface): Surface to render to in gui space.
             delta (float): Time since last render call, used for animations.
         """
+        dirty_rects = []
+
         # Draw title background animation if in any title
         if ("title" in self.state) or ("select_save" in self.state) or ("title_settings" in self.state) or ("name" in self.state) or ("end_game" in self.state):
-            self.title_background.render(
+            dirty_rects += self.title_background.render(
                 surface, pygame.Vector2(0, 0), delta=delta)
         # Only draw logo animation on endgame and title screen
         if ("title" in self.state) or ("end_game" in self.state):
-            self.title_animation.render(surface, delta=delta)
+            dirty_rects += self.title_animation.render(surface, delta=delta)
+
+        return dirty_rects
+
+    def get_element_rects(self):
+        """ Returns list of rectangles covered by visible gui elements, which may redraw themselves each frame """
+        return [element.rect for name in self.state if name in self.menus for element in self.menus[name].values()]
 
     def set_state(self, *state):
         """ Update gui state, changes visibility of elements and sprites.
@@ -1,5 +1,5 @@
 import pygame, json, copy, random, math
-from Packages import Settings, Sprite, Enemy, Player, Water, Dialog
+from Packages import Settings, Sprite, Enemy, Player, Water, Dialog, LevelAssets, LevelBundle, Collision
 
 class Particle():
     """ Handles updating position and drawing a single particle 
@@ -34,7 +34,7 @@ class Particle():
             self.update_position(delta)
         rect = pygame.Rect(int(self.position.x+offset.x), int(self.position.y+offset.y), 2, 2) 
         surface.fill(self.color, rect)
-        return [rect.inflate_ip(2, 2)]
+        return [rect.inflate(2, 2)]
 
 class Level():
     """ General class for handling loading save and levels from disk and managing transitions .
@@ -70,11 +70,20 @@ class Level():
         self.level_name = level_name
         self.save_level = level_name
 
+        # Decodes neighbouring levels on a loading thread so transitions don't stall
+        self.prefetcher = LevelAssets.Prefetcher(self.decode_assets, self.build_assets)
+
         # Setup collider arrays
         self.colliders, self.death_colliders, self.hitable_colliders, self.save_colliders, self.transitions, self.waters, self.water_colliders, self.toxic_waters, self.toxic_water_colliders,  self.enemies, self.collectables = [],[],[],[],[],[],[],[],[],[],[]
+        # Every collider of level in typed layers, static colliders are added when loading and enemies when resetting
+        self.collision_world = Collision.CollisionWorld(Settings.COLLISION_CELL_SIZE)
 
         self.dialog_boxes = []
 
+        # Entities reused each time level is reset, by entity type
+        self.spawns = {"player": None, "enemies": (), "flying_enemies": (), "collectables": ()}
+        self.entity_pools = {"enemies": [], "flying_enemies": [], "collectables": []}
+
         # Setup particles
         self.particles = []
         self.colors = [pygame.Color(0, 0, 0)]
@@ -90,25 +99,28 @@ class Level():
         if should_load:
             self.load_level(level_name)
                 
-    def get_colliders(self):
-        """ Getter for physical colliders"""
-        return self.colliders
-
-    def get_death_colliders(self):
-        """ Getter for death colliders"""
-        return self.death_colliders
-    
-    def get_hitable_colliders(self):
-        """ Getter for hitable colliders"""
-        return self.hitable_colliders
-    
-    def get_save_colliders(self):
-        """ Getter for save colliders"""
-        return self.save_colliders
-    
-    def get_water_colliders(self):
-        """ Getter for water colliders"""
-        return self.water_colliders + self.toxic_water_colliders
+    def build_collision_world(self):
+        """ Adds static colliders of level to collision world in their layers, replacing those of previous level """
+        self.collision_world.clear()
+        for collider in self.colliders:
+            self.collision_world.add_static(collider, Collision.SOLID)
+        for collider in self.death_colliders:
+            self.collision_world.add_static(collider, Collision.DEATH)
+        for collider in self.hitable_colliders:
+            self.collision_world.add_static(collider, Collision.HITABLE)
+        for collider in self.save_colliders:
+            self.collision_world.add_static(collider, Collision.SAVE)
+        for collider in self.water_colliders:
+            self.collision_world.add_static(collider, Collision.WATER)
+        for collider in self.toxic_water_colliders:
+            self.collision_world.add_static(collider, Collision.TOXIC)
+        for transition in self.transitions:
+            self.collision_world.add_static(transition["collider"], Collision.TRANSITION, transition)
+        for dialog in self.dialog_boxes:
+            self.collision_world.add_static(dialog.collider, Collision.DIALOG, dialog)
+        # Floor probes index tiles of solid colliders directly rather than searching them
+        if Settings.TILE_GRID_COLLISION:
+            self.collision_world.build_solid_grid(Settings.COLLISION_TILE_SIZE)
 
     def render_colliders(self, surface, offset):
         """ Draws level colliders to surface for debugging purposes.
@@ -179,13 +191,16 @@ class Level():
                 dirty_rects += self.particles[i].render(surface, self.position + offset, delta)
                 i+=1
 
+        # Only the part of surface left visible after camera scaling needs drawing
+        view = Settings.camera.get_view_rect(surface)
+
         # Draw infront portion of water objects
         for sprite in self.waters + self.toxic_waters:
-            dirty_rects += sprite.render_infront(delta, surface, self.position + offset)
-        # Draw all infront sprites with added parallax effect
+            dirty_rects += sprite.render_infront(delta, surface, self.position + offset, view)
+        # Draw visible part of infront sprites with added parallax effect
         for sprite in self.sprites_infront:
             render_position = self.position + pygame.Vector2(offset.x*sprite["parallax"].x, offset.y*sprite["parallax"].y)
-            sprite["sprite"].render(surface, render_position)
+            sprite["sprite"].render_visible(surface, view, render_position)
 
         return dirty_rects
 
@@ -199,13 +214,15 @@ class Level():
             offset (pygame.Vector2): Camera position.
 
         """
+        view = Settings.camera.get_view_rect(surface)
+
         # Draw behind portion of waters
         for sprite in self.waters + self.toxic_waters:
-            sprite.render_behind(delta, surface, self.position + offset)
-        # Draw all behind sprites with added parallax effect
+            sprite.render_behind(delta, surface, self.position + offset, view)
+        # Draw visible part of behind sprites with added parallax effect
         for sprite in self.sprites_behind:
             render_position = self.position + pygame.Vector2(offset.x*sprite["parallax"].x, offset.y*sprite["parallax"].y)
-            sprite["sprite"].render(surface, render_position)
+            sprite["sprite"].render_visible(surface, view, render_position)
     
     def load_save(self, save_num):
         """ Load save file from disk.
@@ -240,17 +257,32 @@ class Level():
             except Exception as e:
                 if Settings.DEBUG:
                     print(f"Failed to write save {save_filename}, error: ", e)
-            self.save_level = copy.deepcopy(Settings.DEFAULT_SAVE["save_level"])
-            self.dialog_completion = copy.deepcopy(Settings.DEFAULT_SAVE["dialog_completion"])
-            self.has_begun = copy.deepcopy(Settings.DEFAULT_SAVE["has_begun"])
-            self.name = copy.deepcopy(Settings.DEFAULT_SAVE["name"])
-            self.challenges = copy.deepcopy(Settings.DEFAULT_SAVE["challenges"])
+            self.reset_save()
             self.load_level(self.save_level)
         # Update save dialog completetion to intially match loaded
         self.save_dialog_completion = copy.deepcopy(self.dialog_completion)
         # Play unsit and add lives for collectables
         self.player.play_animation("unsit")
         self.player.hearts += len(self.collectables)
+    def reset_save(self):
+        """ Sets save properties of level to those of a new save, without loading a level """
+        self.save_level = copy.deepcopy(Settings.DEFAULT_SAVE["save_level"])
+        self.dialog_completion = copy.deepcopy(Settings.DEFAULT_SAVE["dialog_completion"])
+        self.save_dialog_completion = copy.deepcopy(Settings.DEFAULT_SAVE["dialog_completion"])
+        self.has_begun = copy.deepcopy(Settings.DEFAULT_SAVE["has_begun"])
+        self.name = copy.deepcopy(Settings.DEFAULT_SAVE["name"])
+        self.challenges = copy.deepcopy(Settings.DEFAULT_SAVE["challenges"])
+    def load_fresh(self, level_name):
+        """ Loads level with a new save which respawns in that level, eg. for benchmarks and replays.
+
+        Args:
+            level_name (str): Name of directory of level (required).
+        """
+        self.reset_save()
+        self.save_level = level_name
+        # Replace player so keys held and hearts don't carry over from previous play
+        self.player = self.player_base.copy()
+        self.load_level(level_name)
     def save_game(self):
         """ Writes current level properties to the currently selected save file """
         # Get filename
@@ -285,40 +317,262 @@ class Level():
             if Settings.DEBUG:
                 print(f"Failed to write save {save_filename}, error: ", e)
 
-    def load_level(self, level_name="Tutorial1", transition=None):
-        """ Load level from level directory and handle transitions
+    def bake_layers(self, sprites):
+        """ Composites consecutive layers sharing the same parallax into a single layer.
+        Returns list of sprites, with a layer per run of equal parallax.
+
+        Args:
+            sprites ([dict]): Layer sprites sorted by depth, as constructed by load_level (required).
+        """
+        baked = []
+        i = 0
+        while i < len(sprites):
+            # Find run of layers with same parallax, which always stay aligned when rendered
+            j = i + 1
+            while j < len(sprites) and sprites[j]["parallax"] == sprites[i]["parallax"]:
+                j += 1
+            if j - i == 1:
+                baked.append(sprites[i])
+            else:
+                # Composite in premultiplied alpha so blending the result once matches blending each layer in turn
+                size = (max(a["sprite"].image.get_width() for a in sprites[i:j]), max(a["sprite"].image.get_height() for a in sprites[i:j]))
+                # Left unconverted so baking can run on a loading thread, chunks are converted afterwards
+                image = pygame.Surface(size, pygame.SRCALPHA)
+                for sprite in sprites[i:j]:
+                    image.blit(Sprite.premultiply_alpha(sprite["sprite"].image), (0, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+                composite = Sprite.ImageSprite(special_flags=pygame.BLEND_PREMULTIPLIED)
+                composite.image = image
+                baked.append({
+                    "sprite": composite,
+                    "depth": sprites[j-1]["depth"],
+                    "parallax": sprites[i]["parallax"]
+                })
+            i = j
+        return baked
+
+    def load_assets(self, level_name):
+        """ Loads parts of level which never change during play, using level cache or prefetched assets when possible.
+        Returns dict of parsed json, layer sprites and tiled waters, which must not be modified.
 
         Args:
             level_name (str): Name of directory of level (required).
-            transition (dict): Optional transition that player is entering level from.
         """
-        # Get filename and read level json data
-        self.level_name=level_name
-        self.level_filename = f"{Settings.SRC_DIRECTORY}Levels/{self.level_name}/level.json"
-        with open(self.level_filename) as json_file:
-            level_json_data = json.load(json_file)
+        assets = Settings.level_cache.get(level_name)
+        if not assets == None:
+            return assets
+
+        # Finish building prefetched level now, otherwise decode from scratch
+        builder = self.prefetcher.take(level_name)
+        if builder == None:
+            builder = self.build_assets(level_name, self.decode_assets(level_name))
+        return LevelAssets.advance(builder)
+
+    def load_assets_steps(self, level_name):
+        """ Generator which loads assets like load_assets, but decodes on the loading thread and builds a step at a time.
+        Yields while waiting or between steps and returns assets once loaded.
+
+        Args:
+            level_name (str): Name of directory of level (required).
+        """
+        assets = Settings.level_cache.get(level_name)
+        if not assets == None:
+            return assets
+
+        # Decode ahead of any levels being prefetched, letting frames continue meanwhile
+        self.prefetcher.request([level_name], priority=True)
+        while self.prefetcher.is_decoding(level_name):
+            yield
+        builder = self.prefetcher.take(level_name)
+        if builder == None:
+            # Decoding failed on loading thread, so decode here to raise the error
+            builder = self.build_assets(level_name, self.decode_assets(level_name))
+        return (yield from builder)
+
+    def decode_assets(self, level_name):
+        """ Reads level files from disk and decodes, bakes and chunks layer images without converting them.
+        Safe to run on a loading thread since it doesn't touch the display, random numbers or level state.
+        Returns dict of decoded assets to be passed to build_assets.
+
+        Args:
+            level_name (str): Name of directory of level (required).
+        """
+        level_directory = f"{Settings.SRC_DIRECTORY}Levels/{level_name}/"
+        # Load everything from compiled bundle when it is up to date, otherwise from json and pngs
+        bundle_filename = LevelBundle.get_bundle_filename(level_directory)
+        if not bundle_filename == None:
+            level_json_data, json_data, images = LevelBundle.load(bundle_filename)
+        else:
+            with open(level_directory + "level.json") as json_file:
+                level_json_data = json.load(json_file)
+            # Load entities json data describing rectangular shaps for colliders and position of entities
+            with open(level_directory + level_json_data['entities']['filename']) as json_file:
+                json_data = json.load(json_file)
+            # Decode every layer png at once, pygame releases the GIL while decoding
+            filenames = [image_layer["filename"] for image_layer in level_json_data["layers"]]
+            images = dict(zip(filenames, LevelAssets.decode_images([level_directory + filename for filename in filenames], Settings.level_decoder)))
+        entities_filename = level_directory + level_json_data['entities']['filename']
+
+        # Merge physical colliders into fewer larger rects covering the same area, leaving fewer colliders and seams to snag on
+        colliders = [pygame.Rect(collider["x"], collider["y"], collider["width"], collider["height"]) for collider in json_data.get("collisions", [])]
+        if Settings.MERGE_COLLIDERS:
+            colliders = Collision.merge_rects(colliders)
         
         # Sort layers of level by depth
         sorted_layers = sorted(level_json_data["layers"], key = lambda x: x["depth"])
         # Reset sprite lists and place anything of depth <= 0 behind entities
-        self.sprites_behind, self.sprites_infront = [],[]
+        sprites_behind, sprites_infront = [],[]
         for image_layer in sorted_layers:
+            # Construct image sprite from decoded image and save parallax and depth
+            sprite = {
+                "sprite": Sprite.ImageSprite(),
+                "depth": image_layer["depth"],
+                "parallax": pygame.Vector2(image_layer["parallaxX"],image_layer["parallaxY"])
+            }
+            sprite["sprite"].image = images[image_layer["filename"]]
             if image_layer["depth"] <= 0:
-                # Construct image sprite from filenames and save parallax and depth
-                self.sprites_behind.append({
-                    "sprite": Sprite.ImageSprite( image_filename=f"{Settings.SRC_DIRECTORY}Levels/{self.level_name}/{image_layer['filename']}"),
-                    "depth": image_layer["depth"],
-                    "parallax": pygame.Vector2(image_layer["parallaxX"],image_layer["parallaxY"])   
-                })
+                sprites_behind.append(sprite)
             else:
-                self.sprites_infront.append({
-                    "sprite": Sprite.ImageSprite( image_filename=f"{Settings.SRC_DIRECTORY}Levels/{self.level_name}/{image_layer['filename']}"),
-                    "depth": image_layer["depth"],
-                    "parallax": pygame.Vector2(image_layer["parallaxX"],image_layer["parallaxY"])   
-                })
+                sprites_infront.append(sprite)
+        # Flatten layers which move together so each is only blitted once per frame
+        sprites_behind = self.bake_layers(sprites_behind)
+        sprites_infront = self.bake_layers(sprites_infront)
+        # Split into chunks so empty regions cost nothing and only visible chunks are drawn
+        for sprite in sprites_behind + sprites_infront:
+            sprite["sprite"] = Sprite.ChunkedImageSprite(sprite["sprite"].image, Settings.LEVEL_CHUNK_SIZE, sprite["sprite"].special_flags, convert=False)
+
+        return {
+            "level_json": level_json_data,
+            "entities_json": json_data,
+            "entities_filename": entities_filename,
+            "colliders": colliders,
+            "sprites_behind": sprites_behind,
+            "sprites_infront": sprites_infront,
+        }
+
+    def build_assets(self, level_name, decoded):
+        """ Generator which converts decoded layer chunks and tiles water, then adds finished assets to level cache.
+        Must be run on the main thread, yields after each step so building can be spread across frames.
+        Returns finished assets as the generator's return value.
+
+        Args:
+            level_name (str): Name of directory of level (required).
+            decoded (dict): Decoded assets from decode_assets (required).
+        """
+        size = 0
+        for sprite in decoded["sprites_behind"] + decoded["sprites_infront"]:
+            yield from sprite["sprite"].convert_chunks()
+            size += sum(LevelAssets.surface_bytes(chunk["image"]) for chunk in sprite["sprite"].chunks)
+
+        # Tile water from its own generator seeded by level name, so tiling is identical whenever it happens
+        rng = random.Random(level_name)
+        json_data = decoded["entities_json"]
+        entities_filename = decoded["entities_filename"]
+
+        # Load water entities by calling tile from rect on size collider
+        waters = []
+        water_colliders = []
+        if "water" in json_data:
+            for water in json_data["water"]:
+                waters.append(self.water_base.copy())
+                waters[-1].tile_from_rect(pygame.Rect(water["x"], water["y"], water["width"], water["height"]), rng=rng)
+                water_colliders.append(pygame.Rect(water["x"], water["y"], water["width"], water["height"]))
+                yield
+        elif Settings.DEBUG:
+            print(f"No water entity layer found in {entities_filename}")
+        
+        toxic_waters = []
+        toxic_water_colliders = []
+        if "toxic_water" in json_data:
+            for toxic_water in json_data["toxic_water"]:
+                toxic_waters.append(self.toxic_water_base.copy())
+                toxic_waters[-1].tile_from_rect(pygame.Rect(toxic_water["x"], toxic_water["y"], toxic_water["width"], toxic_water["height"]), rng=rng)
+                toxic_water_colliders.append(pygame.Rect(toxic_water["x"], toxic_water["y"], toxic_water["width"], toxic_water["height"]))
+                yield
+        elif Settings.DEBUG:
+            print(f"No toxic_water entity layer found in {entities_filename}")
+        for water in waters + toxic_waters:
+            size += LevelAssets.surface_bytes(water.image_infront) + LevelAssets.surface_bytes(water.image_behind)
+
+        assets = {
+            "level_json": decoded["level_json"],
+            "entities_json": json_data,
+            "entities_filename": entities_filename,
+            "colliders": decoded["colliders"],
+            "sprites_behind": decoded["sprites_behind"],
+            "sprites_infront": decoded["sprites_infront"],
+            "waters": waters,
+            "water_colliders": water_colliders,
+            "toxic_waters": toxic_waters,
+            "toxic_water_colliders": toxic_water_colliders,
+        }
+        Settings.level_cache.put(level_name, assets, size)
+        return assets
+
+    def prefetch_neighbours(self, level_json_data):
+        """ Starts decoding levels reachable through level's transitions in the background, skipping cached levels.
+
+        Args:
+            level_json_data (dict): Parsed level.json of current level (required).
+        """
+        if not Settings.PREFETCH_LEVELS:
+            return
+        neighbours = []
+        for info in level_json_data.get("level_transition", []):
+            if not info["to_level"] == self.level_name and not info["to_level"] in neighbours and not info["to_level"] in Settings.level_cache.entries:
+                neighbours.append(info["to_level"])
+        self.prefetcher.request(neighbours)
+
+    def prepare_level(self, level_name, threaded=True):
+        """ Generator which loads assets and builds dialog boxes of level a step at a time, without changing the current level.
+        Returns prepared level to pass to load_level once finished.
+
+        Args:
+            level_name (str): Name of directory of level (required).
+            threaded (bool): Whether to decode on the loading thread, yielding while waiting, rather than blocking.
+        """
+        if threaded:
+            assets = yield from self.load_assets_steps(level_name)
+        else:
+            assets = self.load_assets(level_name)
+        json_data, level_json_data = assets["entities_json"], assets["level_json"]
+
+        # Traverse dialog data together to extract constant and boundary info
+        dialog_boxes = []
+        if "dialog" in json_data and "dialog" in level_json_data:
+            for bounds, info in zip(json_data["dialog"], level_json_data["dialog"]):
+                if (not info["save_progress_name"] in self.dialog_completion) or (not self.dialog_completion[info["save_progress_name"]]):
+                    dialog_boxes.append(Dialog.Dialog(
+                        info["text"],
+                        pygame.Rect(bounds["x"], bounds["y"], bounds["width"], bounds["height"]),
+                        info["save_progress_name"]
+                    ))
+                    yield
+        elif Settings.DEBUG:
+            print(f"No dialog entity layer found in {assets['entities_filename']} and/or {level_name}")
+        return {"level_name": level_name, "assets": assets, "dialog_boxes": dialog_boxes}
+
+    def load_level(self, level_name="Tutorial1", transition=None, prepared=None):
+        """ Load level from level directory and handle transitions
+
+        Args:
+            level_name (str): Name of directory of level (required).
+            transition (dict): Optional transition that player is entering level from.
+            prepared (dict): Level already prepared by prepare_level, otherwise level is prepared immediately.
+        """
+        # Get level assets which don't change during play and dialog boxes, preparing them now unless done in advance
+        if prepared == None or not prepared["level_name"] == level_name:
+            prepared = LevelAssets.advance(self.prepare_level(level_name, threaded=False))
+        self.level_name=level_name
+        self.level_filename = f"{Settings.SRC_DIRECTORY}Levels/{self.level_name}/level.json"
+        assets = prepared["assets"]
+        level_json_data = assets["level_json"]
+        self.entities_json = assets["entities_json"]
+
+        self.sprites_behind, self.sprites_infront = list(assets["sprites_behind"]), list(assets["sprites_infront"])
         # Determine level size from first behind level sprite
         # NOTE: Fails when no behind layer exists
-        self.level_size = [self.sprites_behind[0]["sprite"].image.get_width(), self.sprites_behind[0]["sprite"].image.get_height()]
+        self.level_size = list(self.sprites_behind[0]["sprite"].get_size())
 
         # Intialize particles randomly across screen with correct colours and velocity ranges
         if "particles" in level_json_data:
@@ -344,17 +598,15 @@ class Level():
         elif Settings.DEBUG:
             print("No particles data found in", self.level_filename)
 
-        # Load entities json data describing rectangular shaps for colliders and position of entities
-        self.entities_filename = f"{Settings.SRC_DIRECTORY}Levels/{self.level_name}/{level_json_data['entities']['filename']}"
-        with open(self.entities_filename) as json_file:
-            json_data = json.load(json_file)
+        # Entities json data describes rectangular shaps for colliders and position of entities
+        self.entities_filename = assets["entities_filename"]
+        json_data = self.entities_json
+        # Compile spawn positions once so resetting the level only resets pooled entities
+        self.spawns = self.compile_spawns(json_data)
 
         # Load each entity from json data
-        self.colliders = []
-        if "collisions" in json_data:
-            for collider in json_data["collisions"]:
-                self.colliders.append(pygame.Rect(collider["x"], collider["y"], collider["width"], collider["height"]))
-        elif Settings.DEBUG:
+        self.colliders = [collider.copy() for collider in assets["colliders"]]
+        if not "collisions" in json_data and Settings.DEBUG:
             print(f"No collisions entity layer found in {self.entities_filename}")
         
         self.death_colliders = []
@@ -393,48 +645,26 @@ class Level():
             if Settings.DEBUG:
                 print(f"Failed to load transition entities {self.entities_filename}, and/or {self.level_filename}")
 
-        # Load water entities by calling tile from rect on size collider
-        self.waters = []
-        self.water_colliders = []
-        if "water" in json_data:
-            for water in json_data["water"]:
-                self.waters.append(self.water_base.copy())
-                self.waters[-1].tile_from_rect(pygame.Rect(water["x"], water["y"], water["width"], water["height"]))
-                self.water_colliders.append(pygame.Rect(water["x"], water["y"], water["width"], water["height"]))
-        elif Settings.DEBUG:
-            print(f"No water entity layer found in {self.entities_filename}")
-        
-        self.toxic_waters = []
-        self.toxic_water_colliders = []
-        if "toxic_water" in json_data:
-            for toxic_water in json_data["toxic_water"]:
-                self.toxic_waters.append(self.toxic_water_base.copy())
-                self.toxic_waters[-1].tile_from_rect(pygame.Rect(toxic_water["x"], toxic_water["y"], toxic_water["width"], toxic_water["height"]))
-                self.toxic_water_colliders.append(pygame.Rect(toxic_water["x"], toxic_water["y"], toxic_water["width"], toxic_water["height"]))
-        elif Settings.DEBUG:
-            print(f"No toxic_water entity layer found in {self.entities_filename}")
+        # Water is tiled when assets are loaded
+        self.waters = list(assets["waters"])
+        self.water_colliders = [collider.copy() for collider in assets["water_colliders"]]
+        self.toxic_waters = list(assets["toxic_waters"])
+        self.toxic_water_colliders = [collider.copy() for collider in assets["toxic_water_colliders"]]
 
-        # Again traverse data together to extract constant and boundary info
-        self.dialog_boxes = []
-        if "dialog" in json_data and "dialog" in level_json_data:
-            for bounds, info in zip(json_data["dialog"], level_json_data["dialog"]):
-                if (not info["save_progress_name"] in self.dialog_completion) or (not self.dialog_completion[info["save_progress_name"]]):
-                    self.dialog_boxes.append(Dialog.Dialog(
-                        info["text"],
-                        pygame.Rect(bounds["x"], bounds["y"], bounds["width"], bounds["height"]),
-                        info["save_progress_name"]
-                    ))
-        elif Settings.DEBUG:
-            print(f"No dialog entity layer found in {self.entities_filename} and/or {self.level_filename}")
+        # Dialog boxes are built when level is prepared
+        self.dialog_boxes = prepared["dialog_boxes"]
+
+        # Colliders don't move once loaded, so bucket them for collision queries once
+        self.build_collision_world()
             
         # Load resetable elements of level eg. player and enemies
         self.reset_level()
 
         # Configure level settings
-        Settings.camera.contraints_max = pygame.Vector2(
-            self.sprites_behind[0]["sprite"].image.get_rect().width,
-            self.sprites_behind[0]["sprite"].image.get_rect().height,
-        )
+        Settings.camera.contraints_max = pygame.Vector2(self.sprites_behind[0]["sprite"].get_size())
+
+        # Get levels player could transition to ready while this level is played
+        self.prefetch_neighbours(level_json_data)
 
         # Handle transition
         if not transition == None:
@@ -474,61 +704,72 @@ class Level():
                 self.player.flipX = True
         # Jump camera to correct position
         Settings.camera.set_position(self.player.position, Settings.surface)
+    def compile_spawns(self, json_data):
+        """ Extracts spawn positions of resetable entities from entities json, so resetting never needs to parse it.
+        Returns dict of entity type to tuple of level space positions, with None for player if level has none.
+
+        Args:
+            json_data (dict): Parsed entities json of level (required).
+        """
+        spawns = {"player": None, "enemies": (), "flying_enemies": (), "collectables": ()}
+        # Player position is offset horizontally on both axes to match previous spawning
+        if "player" in json_data:
+            player_info = json_data["player"][0]
+            spawns["player"] = pygame.Vector2(
+                player_info["x"] - self.player_base.collider_offset.x,
+                player_info["y"] - self.player_base.collider_offset.x,
+            )
+        elif Settings.DEBUG:
+            print(f"No players entity layer found in {self.entities_filename}")
+        for name, base in (("enemies", self.enemy_base), ("flying_enemies", self.flying_enemy_base), ("collectables", self.collectable_base)):
+            if name in json_data:
+                spawns[name] = tuple(pygame.Vector2(entity["x"] - base.collider_offset.x, entity["y"] - base.collider_offset.y) for entity in json_data[name])
+            elif Settings.DEBUG:
+                print(f"No {name} entity layer found in {self.entities_filename}")
+        return spawns
+
+    def spawn_pooled(self, name, base, positions):
+        """ Resets pooled entities to base at each position, growing pool when level has more entities than before.
+        Returns list of spawned entities.
+
+        Args:
+            name (str): Name of pool eg. "enemies" (required).
+            base (Sprite.AnimatedSprite): Base entity pooled entities are reset to (required).
+            positions ((pygame.Vector2)): Spawn positions (required).
+        """
+        pool = self.entity_pools[name]
+        while len(pool) < len(positions):
+            pool.append(base.copy())
+        for entity, position in zip(pool, positions):
+            entity.reset_state(base)
+            entity.position = pygame.Vector2(position)
+        return pool[:len(positions)]
+
     def reset_level(self):
         """ Load parts of level which are reset when player dies """
-        # Load entities data
-        with open(self.entities_filename) as json_file:
-            json_data = json.load(json_file)
-
         # Load player while maintaining number of hearts and key state
-        if "player" in json_data:
+        if not self.spawns["player"] == None:
             old_player_hearts = self.player.hearts
             old_player_key_state = self.player.key_state
 
-            player_info = json_data["player"][0]
-            self.player = self.player_base.copy()
-            # Extract position from entities
-            self.player.position = pygame.Vector2(
-                player_info["x"] - self.player.collider_offset.x,
-                player_info["y"] - self.player.collider_offset.x,
-            )
+            self.player.reset_state(self.player_base)
+            self.player.position = pygame.Vector2(self.spawns["player"])
             self.player.hearts = old_player_hearts
             self.player.key_state = old_player_key_state
-        elif Settings.DEBUG:
-            print(f"No players entity layer found in {self.entities_filename}")
 
         # Load patrolling and flying enemies and position correctly
-        self.enemies = []
-        if "enemies" in json_data:
-            for enemy in json_data["enemies"]:
-                self.enemies.append(self.enemy_base.copy())
-                self.enemies[-1].position = pygame.Vector2(
-                    enemy["x"] - self.enemy_base.collider_offset.x,
-                    enemy["y"] - self.enemy_base.collider_offset.y,
-                )
-        elif Settings.DEBUG:
-            print(f"No enemies entity layer found in {self.entities_filename}")
-        if "flying_enemies" in json_data:
-            for enemy in json_data["flying_enemies"]:
-                self.enemies.append(self.flying_enemy_base.copy())
-                self.enemies[-1].position = pygame.Vector2(
-                    enemy["x"] - self.flying_enemy_base.collider_offset.x,
-                    enemy["y"] - self.flying_enemy_base.collider_offset.y,
-                )
-                self.enemies[-1].og_position = copy.copy(self.enemies[-1].position)
-        elif Settings.DEBUG:
-            print(f"No flying_enemies entity layer found in {self.entities_filename}")
+        self.enemies = self.spawn_pooled("enemies", self.enemy_base, self.spawns["enemies"])
+        flying_enemies = self.spawn_pooled("flying_enemies", self.flying_enemy_base, self.spawns["flying_enemies"])
+        for enemy in flying_enemies:
+            enemy.og_position = copy.copy(enemy.position)
+        self.enemies += flying_enemies
+        # Enemies move their own colliders in place, so only need adding to collision world again when respawned
+        self.collision_world.clear_dynamic()
+        for enemy in self.enemies:
+            enemy.add_colliders(self.collision_world)
         
         # Load collectable if player hasnt already collected them
         if self.level_name not in self.challenges:
-            self.collectables = []
-            if "collectables" in json_data:
-                for collectable in json_data["collectables"]:
-                    self.collectables.append(self.collectable_base.copy())
-                    self.collectables[-1].position = pygame.Vector2(
-                        collectable["x"] - self.collectable_base.collider_offset.x,
-                        collectable["y"] - self.collectable_base.collider_offset.y,
-                    )
-                    self.collectables[-1].og_position = copy.copy(self.collectables[-1].position)
-            elif Settings.DEBUG:
-                print(f"No collectables entity layer found in {self.entities_filename}")
\ No newline at end of file
+            self.collectables = self.spawn_pooled("collectables", self.collectable_base, self.spawns["collectables"])
+            for collectable in self.collectables:
+                collectable.og_position = copy.copy(collectable.position)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import pygame, threading, time
+from collections import OrderedDict
+
+def advance(steps, budget=float("inf")):
+    """ Advances generator until it finishes or budget is used, always taking at least one step.
+    Returns generator's return value once finished, otherwise None.
+
+    Args:
+        steps (generator): Generator to advance (required).
+        budget (float): Seconds which may be spent advancing, runs to completion by default.
+    """
+    start = time.perf_counter()
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+        if time.perf_counter() - start >= budget:
+            return None
+
+def decode_image(filename):
+    """ Decodes image file without converting it, adding an alpha channel if it has none so it can be baked.
+    Safe to run on any thread since it doesn't touch the display.
+
+    Args:
+        filename (str): Path of image (required).
+    """
+    image = pygame.image.load(filename)
+    if not image.get_flags() & pygame.SRCALPHA:
+        # Give images without alpha an alpha channel, as convert_alpha would
+        image_alpha = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        image_alpha.blit(image, (0, 0))
+        image = image_alpha
+    return image
+
+def decode_images(filenames, executor=None):
+    """ Decodes image files concurrently on executor, waiting for all of them to finish.
+    Returns list of images in the same order as filenames.
+
+    Args:
+        filenames ([str]): Paths of images (required).
+        executor (concurrent.futures.Executor): Pool images are decoded on, decodes one at a time on calling thread if None.
+    """
+    if executor == None or len(filenames) <= 1:
+        return [decode_image(filename) for filename in filenames]
+    return list(executor.map(decode_image, filenames))
+
+def surface_bytes(surface):
+    """ Estimates memory used by surface's pixels in bytes.
+
+    Args:
+        surface (pygame.Surface): Surface to measure (required).
+    """
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+class LevelCache():
+    """ Least recently used cache of level assets keyed by level name, evicting levels once over a memory budget.
+
+    Args:
+        budget (int): Maximum estimated bytes of assets held, 0 disables caching.
+    """
+    def __init__(self, budget=256*1024*1024):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, level_name):
+        """ Gets cached assets of level, marking them as most recently used.
+        Returns assets or None if level isn't cached.
+
+        Args:
+            level_name (str): Name of level (required).
+        """
+        if not level_name in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(level_name)
+        return self.entries[level_name]["assets"]
+
+    def put(self, level_name, assets, size):
+        """ Adds assets of level to cache, evicting least recently used levels until within budget.
+        Assets larger than the whole budget aren't cached.
+
+        Args:
+            level_name (str): Name of level (required).
+            assets (dict): Assets of level, must not be modified once cached (required).
+            size (int): Estimated bytes used by assets (required).
+        """
+        self.remove(level_name)
+        if size > self.budget:
+            return
+        self.entries[level_name] = {"assets": assets, "size": size}
+        self.size += size
+        while self.size > self.budget:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, level_name):
+        """ Removes level from cache if present.
+
+        Args:
+            level_name (str): Name of level (required).
+        """
+        if level_name in self.entries:
+            self.size -= self.entries.pop(level_name)["size"]
+
+    def clear(self):
+        """ Removes every level from cache """
+        self.entries.clear()
+        self.size = 0
+
+class Prefetcher():
+    """ Decodes levels on a background thread and builds them on the main thread within a time budget each frame.
+    Decoding must not touch the display, while building is a generator which is advanced a step at a time.
+
+    Args:
+        decode (function): Takes level name and returns decoded assets, run on loading thread (required).
+        build (function): Takes level name and decoded assets and returns generator which finishes them, run on main thread (required).
+    """
+    def __init__(self, decode, build):
+        self.decode = decode
+        self.build = build
+        self.condition = threading.Condition()
+        self.thread = None
+
+        # Levels waiting to be decoded in order, level currently being decoded and levels decoded but not yet built
+        self.queued = []
+        self.decoding = None
+        self.decoded = OrderedDict()
+        # Partially built levels keyed by level name
+        self.builders = OrderedDict()
+
+    def request(self, level_names, priority=False):
+        """ Queues levels to be decoded in the background, ignoring levels already requested.
+
+        Args:
+            level_names ([str]): Names of levels to prefetch (required).
+            priority (bool): Whether levels are decoded before levels already queued.
+        """
+        with self.condition:
+            for level_name in level_names:
+                if priority and level_name in self.queued:
+                    self.queued.remove(level_name)
+                if not (level_name in self.queued or level_name == self.decoding or level_name in self.decoded or level_name in self.builders):
+                    if priority:
+                        self.queued.insert(0, level_name)
+                    else:
+                        self.queued.append(level_name)
+            if len(self.queued) > 0 and (self.thread == None or not self.thread.is_alive()):
+                # Daemon so an unfinished decode never stops the game from quitting
+                self.thread = threading.Thread(target=self._decode_queued, name="LevelPrefetch", daemon=True)
+                self.thread.start()
+
+    def _decode_queued(self):
+        """ Loading thread loop which decodes queued levels until none are left """
+        while True:
+            with self.condition:
+                if len(self.queued) == 0:
+                    self.thread = None
+                    return
+                level_name = self.queued.pop(0)
+                self.decoding = level_name
+            try:
+                decoded = self.decode(level_name)
+            except Exception as e:
+                # Leave failures to be reported when the level is loaded normally
+                decoded = None
+                print(f"Failed to prefetch level {level_name}, error: ", e)
+            with self.condition:
+                self.decoding = None
+                if not decoded == None:
+                    self.decoded[level_name] = decoded
+                self.condition.notify_all()
+
+    def is_decoding(self, level_name):
+        """ Returns whether level is waiting to be or currently being decoded.
+
+        Args:
+            level_name (str): Name of level (required).
+        """
+        with self.condition:
+            return level_name in self.queued or level_name == self.decoding
+
+    def update(self, budget):
+        """ Advances building of decoded levels until budget is used, must be called on the main thread.
+
+        Args:
+            budget (float): Seconds which may be spent building this call (required).
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < budget:
+            if len(self.builders) == 0:
+                with self.condition:
+                    if len(self.decoded) == 0:
+                        return
+                    level_name, decoded = self.decoded.popitem(last=False)
+                self.builders[level_name] = self.build(level_name, decoded)
+            level_name, builder = next(iter(self.builders.items()))
+            try:
+                next(builder)
+            except StopIteration:
+                # Build adds finished assets to level cache itself
+                del self.builders[level_name]
+
+    def take(self, level_name):
+        """ Removes level from prefetching so it can be finished immediately, waiting if it is being decoded.
+        Returns generator which finishes building level, or None if level wasn't prefetched.
+
+        Args:
+            level_name (str): Name of level (required).
+        """
+        if level_name in self.builders:
+            return self.builders.pop(level_name)
+        with self.condition:
+            # Decoding directly is quicker than waiting behind other queued levels
+            if level_name in self.queued:
+                self.queued.remove(level_name)
+            while self.decoding == level_name:
+                self.condition.wait()
+            if level_name in self.decoded:
+                return self.build(level_name, self.decoded.pop(level_name))
+        return None
+
+    def clear(self, wait=False):
+        """ Discards every queued, decoded and partially built level, a level currently being decoded is still kept unless waited for.
+
+        Args:
+            wait (bool): Whether to wait for level currently being decoded so it is discarded too.
+        """
+        with self.condition:
+            self.queued.clear()
+            while wait and not self.decoding == None:
+                self.condition.wait()
+            self.decoded.clear()
+        self.builders.clear()
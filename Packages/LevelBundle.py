@@ -0,0 +1,101 @@
+import pygame, json, mmap, os, struct
+
+# Bundle layout: header, json metadata, then aligned data region of entity tables and layer pixels at offsets given by the metadata
+MAGIC = b"ASLB"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+# Each entity is a rectangle stored as x, y, width, height
+ENTITY = struct.Struct("<4i")
+ALIGNMENT = 16
+BUNDLE_FILENAME = "level.bundle"
+
+def align(offset):
+    """ Rounds offset up to next multiple of ALIGNMENT.
+
+    Args:
+        offset (int): Byte offset (required).
+    """
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def get_bundle_filename(level_directory):
+    """ Gets path of level's bundle, if it exists and is newer than every other file in the level directory.
+    Returns None when level should be loaded from json and pngs instead.
+
+    Args:
+        level_directory (str): Directory of level ending in a separator (required).
+    """
+    bundle_filename = level_directory + BUNDLE_FILENAME
+    if not os.path.exists(bundle_filename):
+        return None
+    bundle_time = os.path.getmtime(bundle_filename)
+    for entry in os.scandir(level_directory):
+        if not entry.name == BUNDLE_FILENAME and entry.is_file() and entry.stat().st_mtime > bundle_time:
+            return None
+    return bundle_filename
+
+def write(level_directory):
+    """ Compiles level's json and png layers into a single bundle file within level directory.
+    Returns path of written bundle.
+
+    Args:
+        level_directory (str): Directory of level ending in a separator (required).
+    """
+    with open(level_directory + "level.json") as json_file:
+        level_json_data = json.load(json_file)
+    with open(level_directory + level_json_data["entities"]["filename"]) as json_file:
+        entities_json_data = json.load(json_file)
+
+    # Sections are laid out after metadata, with offsets relative to the start of the data region
+    entities, images, sections = [], [], []
+    offset = 0
+    for name, rects in entities_json_data.items():
+        data = b"".join(ENTITY.pack(rect["x"], rect["y"], rect["width"], rect["height"]) for rect in rects)
+        entities.append({"name": name, "count": len(rects), "offset": offset})
+        sections.append((offset, data))
+        offset = align(offset + len(data))
+    for layer in level_json_data["layers"]:
+        image = pygame.image.load(level_directory + layer["filename"])
+        images.append({"filename": layer["filename"], "width": image.get_width(), "height": image.get_height(), "offset": offset})
+        sections.append((offset, pygame.image.tostring(image, "RGBA")))
+        offset = align(offset + len(sections[-1][1]))
+    metadata_bytes = json.dumps({"level": level_json_data, "entities": entities, "images": images}).encode()
+    data_start = align(HEADER.size + len(metadata_bytes))
+
+    bundle_filename = level_directory + BUNDLE_FILENAME
+    with open(bundle_filename, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(metadata_bytes)))
+        file.write(metadata_bytes)
+        for offset, data in sections:
+            file.seek(data_start + offset)
+            file.write(data)
+    return bundle_filename
+
+def load(bundle_filename):
+    """ Memory maps bundle and builds level data directly from the mapped file, without decoding any pngs.
+    Safe to run on a loading thread. Returns tuple of level json, entities json and dict of layer filename to image.
+
+    Args:
+        bundle_filename (str): Path of bundle written by write (required).
+    """
+    with open(bundle_filename, "rb") as file:
+        # Mapping stays open while images built from it are referenced
+        mapped = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    magic, version, metadata_length = HEADER.unpack_from(mapped)
+    if not magic == MAGIC or not version == VERSION:
+        raise ValueError(f"Unsupported level bundle {bundle_filename}")
+    metadata = json.loads(bytes(mapped[HEADER.size:HEADER.size+metadata_length]))
+    data = mapped[align(HEADER.size + metadata_length):]
+
+    # Rebuild entities json from fixed width tables
+    entities_json_data = {}
+    for table in metadata["entities"]:
+        table_data = data[table["offset"]:table["offset"]+table["count"]*ENTITY.size]
+        entities_json_data[table["name"]] = [{"x": x, "y": y, "width": width, "height": height} for x, y, width, height in ENTITY.iter_unpack(table_data)]
+
+    # Images share memory with mapping rather than copying pixels
+    images = {}
+    for image in metadata["images"]:
+        pixels = data[image["offset"]:image["offset"]+image["width"]*image["height"]*4]
+        images[image["filename"]] = pygame.image.frombuffer(pixels, (image["width"], image["height"]), "RGBA")
+    return metadata["level"], entities_json_data, images
@@ -4,7 +4,7 @@ import copy
 import random
 
 # Import custom packages, access objects in Settings global space
-from Packages import Settings, Sprite
+from Packages import Settings, Sprite, Collision
 
 
 class Player(Sprite.AnimatedSprite):
@@ -208,19 +208,14 @@ class Player(Sprite.AnimatedSprite):
                 dirty_rects.append(attack_collider)
         return dirty_rects
 
-    def physics_process(self, delta, colliders=None, damage_colliders=None, hitable_colliders=None, death_colliders=None, save_colliders=None, water_colliders=None, transitions=None, hit_occured=False, allow_movement=True):
+    def physics_process(self, delta, world=None, hit_occured=False, allow_movement=True):
         """ Calculates physics, state changes and transitions for player.
         Returns dictionary of state changes: {"reset": (bool), "transition": (dict or None), "respawn": (bool), "hit": (bool)}
 
         Args:
             delta (float): Constant physics tick, eg. 1 / fps.
-            colliders ([pygame.rect]): List of level's physical colliders.
-            damage_colliders ([pygame.rect]): List of level's damage colliders.
-            hitable_colliders ([pygame.rect]): List of level's hitable colliders, bouncable objects.
-            death_colliders ([pygame.rect]): List of level's death colliders, cause reset when collided.
-            save_colliders ([pygame.rect]): List of level's save colliders, allow saving when colliding.
-            water_colliders ([pygame.rect]): List of level's water colliders.
-            transitions (dict): List of level's transition colliders, change levels when collided.
+            world (Collision.CollisionWorld): Collision world of level, player can't pass through solid colliders, is damaged by enemies, bounces off hitable colliders,
+                resets on death colliders, can save in save colliders, swims in water and toxic water and changes level on transition colliders.
             hit_occured (bool): Flag for when any enemy attack was successful
             allow_movement (bool): Flag to allow player controled movement
         """
@@ -231,16 +226,20 @@ class Player(Sprite.AnimatedSprite):
         # Setup dust states
         hard_landing, soft_landing, hard_turn = False, False, False
 
+        # Find transitions and water player is in before moving with a single query
+        overlaps = []
+        if not world == None:
+            overlaps = world.query(self.collider, Collision.TRANSITION | Collision.WATER | Collision.TOXIC)
+
         # Check for transition events
-        if not transitions == None and self.transition_frames == 0:
-            # Extract colliders from transitions then calculate collision with player
-            collision = self.collider.collidelist(
-                [d["collider"] for d in transitions])
+        if not world == None and self.transition_frames == 0:
+            # Get first transition player collides with
+            collision = Collision.first_in_layers(overlaps, Collision.TRANSITION)
             
             # If collision occurs setup constant velocity based on direction 
             # Setup state to transition out of level 
-            if not collision == -1:
-                self.transition = transitions[collision]
+            if not collision == None:
+                self.transition = collision.item
                 self.transition_frames = self.transition_max_frames
                 if self.transition["direction"] == "S":
                     self.velocity.x = 0
@@ -279,10 +278,10 @@ class Player(Sprite.AnimatedSprite):
                 self.jump_grace_frames -= 1
 
             # Calculate physics with water and splash animations 
-            if not water_colliders == None:
-                collisions = self.collider.collidelist(water_colliders)
-                if not collisions == -1:
-                    collision = water_colliders[collisions]
+            if not world == None:
+                collision = Collision.first_in_layers(overlaps, Collision.WATER | Collision.TOXIC)
+                if not collision == None:
+                    collision = collision.rect
                     if not self.is_in_water:
                         # If player just entered water make big splash
                         self.water_big_splash.play_animation("loop")
@@ -315,8 +314,7 @@ class Player(Sprite.AnimatedSprite):
             collision = False
             if not attack_colliders == None:
                 for attack in attack_colliders:
-                    collision = collision or (
-                        not attack.collidelist(hitable_colliders) == -1)
+                    collision = collision or (not world == None and world.collides(attack, Collision.HITABLE))
 
             if hit_occured or collision:
                 self.can_attack = False
@@ -421,8 +419,23 @@ class Player(Sprite.AnimatedSprite):
                 self.jump_add_time += delta
                 self.velocity.y += delta * self.jump_add_speed
         old_position = copy.deepcopy(self.position)
+        # Speed player lands at, before collisions stop them
+        landing_speed = self.velocity.y
         # Apply velocities using dx = v * dt
-        self.position += (self.velocity + self.constant_velocity) * delta
+        movement = (self.velocity + self.constant_velocity) * delta
+        if not world == None:
+            # Move along each axis until touching a collider, so thin colliders can't be passed through at any speed
+            movement.x, collision = Collision.sweep_axis(self.position + self.collider_offset, self.collider.size, movement.x, 0, world)
+            self.position.x += movement.x
+            if not collision == None:
+                # Apply inelastic collision meaning all momentum is lost in direction of collision
+                self.velocity.x = 0
+            movement.y, collision = Collision.sweep_axis(self.position + self.collider_offset, self.collider.size, movement.y, 1, world)
+            self.position.y += movement.y
+            if not collision == None:
+                self.velocity.y = 0
+        else:
+            self.position += movement
 
         # Adjust collider positions after position change
         self.collider.x = self.position.x + self.collider_offset.x
@@ -433,15 +446,14 @@ class Player(Sprite.AnimatedSprite):
             self.collider_offset.y + self.collider_size.y
 
         # Handle floor collider to determine if player is on the ground
-        if not colliders == None:
-            collision = self.floor_collider.collidelist(colliders)
-            if not collision == -1:
+        if not world == None:
+            if world.probe_solid(self.floor_collider):
                 # If is_on_ground state changes player is landing
                 if self.is_on_ground == False:
                     # Determine landing hardness from vertical velocity
-                    if self.velocity.y > 200:
+                    if landing_speed > 200:
                         hard_landing = True
-                    elif self.velocity.y > 10:
+                    elif landing_speed > 10:
                         soft_landing = True
 
                 self.is_on_ground = True
@@ -451,67 +463,19 @@ class Player(Sprite.AnimatedSprite):
             else:
                 # No collisions mean players isnt on a floor
                 self.is_on_ground = False
-
-            # Handle perfectly inelastic collision between player and environment 
-            for collider in colliders:
-                if self.collider.colliderect(collider):
-                    # Mininmise magnitude of translations so player is pushed out how they came by minimising absoluted value
-                    push_y = min(
-                        # Consider moving down; Hit the top side
-                        collider.top - self.collider.height - self.collider_offset.y - self.position.y+1,
-                        # Consider moving up; Hit the bottom side
-                        collider.bottom - self.collider_offset.y - self.position.y,
-                        key=abs
-                    )
-                    push_x = min(
-                        # Consider moving right; Hit the left side
-                        collider.left - self.collider.width - self.collider_offset.x - self.position.x,
-                        # Consider moving left; Hit the right side
-                        collider.right - self.collider_offset.x - self.position.x,
-                        key=abs
-                    )
-
-                    # Combat high velocities passing through thin colliders
-                    # NOTE: fails when v*dt > size since no collision occurs
-                    if abs(self.velocity.x*delta) > self.collider.width / 2:
-                        # Rather than minimising translation push player out in opposite direction to velocity 
-                        if self.velocity.x > 0:
-                            push_x = collider.left - self.collider.width - \
-                                self.collider_offset.x - self.position.x
-                        else:
-                            push_x = collider.right - self.collider_offset.x - self.position.x
-
-                    if abs(self.velocity.y*delta) > self.collider.height / 2:
-                        # Rather than minimising translation push player out in opposite direction to velocity 
-                        if self.velocity.y > 0:
-                            push_y = collider.top - self.collider.height - \
-                                self.collider_offset.y - self.position.y+1
-                        else:
-                            push_y = collider.bottom - self.collider_offset.y - self.position.y
-
-                    # Choose smaller transformation between vertical and horizontal
-                    if abs(push_x) < abs(push_y):
-                        self.position.x = push_x + self.position.x
-                        # Apply inelastic collision meaning all momentum is lost in direction of collision
-                        if push_x > 0 and self.velocity.x < 0:
-                            self.velocity.x = 0
-                        elif push_x < 0 and self.velocity.x > 0:
-                            self.velocity.x = 0
-                    else:
-                        self.position.y = push_y + self.position.y
-                        # Apply inelastic collision meaning all momentum is lost in direction of collision
-                        if push_y > 0 and self.velocity.y < 0:
-                            self.velocity.y = 0
-                        elif push_y < 0 and self.velocity.y > 0:
-                            self.velocity.y = 0
         else:
             # If no colliders exist player cant be on ground
             self.is_on_ground = False
 
+        # Find enemies, death and save colliders player is in after moving with a single query
+        overlaps = []
+        if not world == None:
+            overlaps = world.query(self.collider, Collision.ENEMY | Collision.ENEMY_WEAPON | Collision.DEATH | Collision.SAVE)
+
         # Check for damage events if not invincible or dying (otherwise continual damage would be applied)
-        if not damage_colliders == None and self.iframes == 0 and not self.animation_name == "death":
-            collision = self.collider.collidelist(damage_colliders)
-            if not collision == -1:
+        if self.iframes == 0 and not self.animation_name == "death":
+            collision = Collision.first_in_layers(overlaps, Collision.ENEMY | Collision.ENEMY_WEAPON)
+            if not collision == None:
                 # Apply changes to state and animations
                 level_state_changes["hit"] = True
                 self.iframes = self.iframe_length
@@ -521,10 +485,10 @@ class Player(Sprite.AnimatedSprite):
                 # Get vector between center of damage collider and center of player
                 # NOTE: fails partially when player inside long collider
                 s = pygame.Vector2(
-                    damage_colliders[collision].left +
-                    damage_colliders[collision].width/2,
-                    damage_colliders[collision].top +
-                    damage_colliders[collision].height/2,
+                    collision.rect.left +
+                    collision.rect.width/2,
+                    collision.rect.top +
+                    collision.rect.height/2,
                 ) - (self.position + self.collider_offset + self.collider_size/2)
 
                 # Apply knockback along axis if vector exists along axis
@@ -534,9 +498,8 @@ class Player(Sprite.AnimatedSprite):
                     self.damage_knockback_speed*(int(s.y < 0)*2 - 1)
 
         # Check for death events if player is alive
-        if not death_colliders == None and not self.animation_name == "death":
-            collision = self.collider.collidelist(death_colliders)
-            if not collision == -1:
+        if not self.animation_name == "death":
+            if not Collision.first_in_layers(overlaps, Collision.DEATH) == None:
                 # Reset level if environmental death occurs
                 self.hearts -= 1
                 level_state_changes["reset"] = True
@@ -546,10 +509,8 @@ class Player(Sprite.AnimatedSprite):
             level_state_changes["respawn"] = True
 
         # Handle save colliders
-        self.can_save = False
-        if not save_colliders == None:
-            # Set flag if player is in save collider
-            self.can_save = not (self.collider.collidelist(save_colliders) == -1)
+        # Set flag if player is in save collider
+        self.can_save = not Collision.first_in_layers(overlaps, Collision.SAVE) == None
 
         # Create dust trails if moving on ground 
         if self.is_on_ground and abs((self.position - old_position).x) > 1:
@@ -865,7 +826,9 @@ class Player(Sprite.AnimatedSprite):
 
         copyobj = Player()
         for name, attr in self.__dict__.items():
-            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+            if name in self.SHARED_ATTRIBUTES:
+                copyobj.__dict__[name] = attr
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
                 copyobj.__dict__[name] = attr.copy()
             else:
                 copyobj.__dict__[name] = copy.deepcopy(attr)
@@ -0,0 +1,100 @@
+import pygame, os
+from concurrent.futures import ThreadPoolExecutor
+
+class Preloader():
+    """ Decodes asset files on a pool of threads ahead of use, leaving only display dependent conversion to the main thread.
+    Loading functions take preloaded results when available, otherwise they load directly.
+
+    Args:
+        workers (int): Number of decoding threads, defaults to one per cpu.
+    """
+    def __init__(self, workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count(), thread_name_prefix="Preload")
+        # Futures of decoded results keyed by type and normalized filename
+        self.jobs = {}
+        self.submitted = 0
+
+    def submit(self, key, function, *args):
+        """ Starts running function on a decoding thread, unless a job with the same key was already submitted.
+
+        Args:
+            key (tuple): Key result is taken with, eg. ("image", filename) (required).
+            function (function): Thread safe function which decodes asset (required).
+            args: Arguments function is called with.
+        """
+        if not key in self.jobs:
+            self.jobs[key] = self.executor.submit(function, *args)
+            self.submitted += 1
+
+    def preload_images(self, directories):
+        """ Decodes every png within directories without converting them.
+
+        Args:
+            directories ([str]): Directories searched recursively for pngs (required).
+        """
+        for directory in directories:
+            for path, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if filename.lower().endswith(".png"):
+                        image_filename = os.path.join(path, filename)
+                        self.submit(("image", os.path.normpath(image_filename)), pygame.image.load, image_filename)
+
+    def take(self, key):
+        """ Removes job from preloader, waiting for it to finish if necessary.
+        Returns decoded result or None if job wasn't submitted or failed, so caller can load normally.
+
+        Args:
+            key (tuple): Key job was submitted with (required).
+        """
+        future = self.jobs.pop(key, None)
+        if future == None:
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def load_image(self, filename):
+        """ Gets image converted for display with transparency, decoding it now if it wasn't preloaded.
+
+        Args:
+            filename (str): Path of image (required).
+        """
+        image = self.take(("image", os.path.normpath(filename)))
+        if image == None:
+            image = pygame.image.load(filename)
+        return image.convert_alpha()
+
+    def get_progress(self):
+        """ Getter for fraction of submitted jobs which have finished """
+        if self.submitted == 0:
+            return 1
+        pending = sum(1 for future in self.jobs.values() if not future.done())
+        return (self.submitted - pending) / self.submitted
+
+    def wait(self, display, color=(255, 255, 255)):
+        """ Draws a progress bar splash to display until every submitted job has finished.
+
+        Args:
+            display (pygame.Surface): Display surface to draw splash to (required).
+            color (tuple): Color of progress bar.
+        """
+        width, height = display.get_size()
+        outline = pygame.Rect(0, 0, width//3, 8)
+        outline.center = (width//2, height//2)
+        while True:
+            progress = self.get_progress()
+            display.fill((0, 0, 0))
+            pygame.draw.rect(display, color, outline, 1)
+            display.fill(color, (outline.x+2, outline.y+2, int((outline.width-4)*progress), outline.height-4))
+            pygame.display.update(outline.inflate(4, 4))
+            # Keep window responsive while waiting
+            pygame.event.pump()
+            if progress >= 1:
+                return
+            pygame.time.wait(16)
+
+    def close(self):
+        """ Discards any results which were never taken and stops decoding threads once idle """
+        self.jobs.clear()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,331 @@
+import pygame, math, threading, queue
+from Packages import Settings
+
+def merge_rects(rects):
+    """ Merges overlapping rectangles into their unions.
+    Returns list of non overlapping rectangles.
+
+    Args:
+        rects ([pygame.Rect]): List of rectangles to merge (required).
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        # Absorb every merged rect which overlaps, restarting since the union may now overlap earlier rects
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+class Presenter():
+    """ Scales render surfaces onto the display using preallocated buffers, so no surfaces are allocated per frame.
+    Optionally tracks dirty rectangles so only changed parts of the display are updated.
+    Optionally scales and flips on a worker thread while the next frame is simulated, adding at most one frame of latency.
+
+    Args:
+        display (pygame.Surface): Display surface which frames are presented to (required).
+        surface (pygame.Surface): Surface which game and gui are rendered to at game resolution (required).
+        dirty_rects (bool): Flag to update display using only dirty rectangles.
+        coverage_threshold (float): Fraction of display covered by dirty rectangles above which whole display is updated.
+        threaded (bool): Flag to present frames on a worker thread.
+    """
+    def __init__(self, display, surface, dirty_rects=False, coverage_threshold=0.5, threaded=False):
+        self.dirty_rects_enabled = dirty_rects
+        self.coverage_threshold = coverage_threshold
+
+        # Setup worker thread which presents one frame while main thread renders the next
+        self.threaded = threaded
+        self.jobs = queue.Queue()
+        self.job_done = threading.Event()
+        self.job_done.set()
+        self.worker_error = None
+        if threaded:
+            threading.Thread(target=self._present_jobs, daemon=True).start()
+
+        self.rebuild(display, surface)
+
+    def rebuild(self, display, surface):
+        """ Reallocates buffers to match display and render surface, must be called when either changes.
+
+        Args:
+            display (pygame.Surface): Display surface which frames are presented to (required).
+            surface (pygame.Surface): Surface which game and gui are rendered to at game resolution (required).
+        """
+        # Worker may be using buffers being replaced
+        self.wait()
+
+        self.display = display
+        self.surface = surface
+
+        # Unscaled frames are copied into alternating slots so worker can present one while the next is rendered
+        self.slots = []
+        self.slot_index = 0
+        if self.threaded:
+            for _ in range(2):
+                self.slots.append({
+                    "world": pygame.Surface(surface.get_size(), pygame.SRCALPHA),
+                    "gui": pygame.Surface(surface.get_size(), pygame.SRCALPHA),
+                    "world_scale": None,
+                })
+
+        # Gui is fitted to display so only needs a buffer when sizes differ
+        if display.get_size() == surface.get_size():
+            self.gui_buffer = None
+        else:
+            self.gui_buffer = pygame.Surface(display.get_size(), pygame.SRCALPHA)
+
+        # World buffer depends on camera scale so is built when first presented
+        self.world_scale = None
+        self.world_source_rect = None
+        self.world_sources = {}
+        self.world_buffer = None
+
+        # Display is stale so reset dirty rect tracking
+        self.dirty_rects = []
+        self.previous_dirty_rects = []
+        self.previous_camera_position = None
+        self.invalidate()
+
+    def _rebuild_world(self, scale):
+        """ Allocates buffer for scaling world rendering by camera scale.
+
+        Args:
+            scale (tuple): x, y components of camera scale (required).
+        """
+        self.world_scale = tuple(scale)
+        display_width, display_height = self.display.get_size()
+        surface_width, surface_height = self.surface.get_size()
+
+        # Size surface is scaled to, of which only the top left lies within display
+        target_width, target_height = int(display_width*scale[0]), int(display_height*scale[1])
+
+        # Subsurfaces of visible region are cached per source surface
+        self.world_sources = {}
+        if (target_width, target_height) == (surface_width, surface_height):
+            # No scaling required so surface is blitted directly
+            self.world_source_rect = None
+            self.world_buffer = None
+        elif target_width % surface_width == 0 and target_height % surface_height == 0:
+            # For integer scales each pixel maps to a block, so only the visible part of surface needs scaling
+            factor_x, factor_y = target_width // surface_width, target_height // surface_height
+            source_width = min(math.ceil(display_width / factor_x), surface_width)
+            source_height = min(math.ceil(display_height / factor_y), surface_height)
+
+            self.world_source_rect = pygame.Rect(0, 0, source_width, source_height)
+            self.world_buffer = pygame.Surface((source_width*factor_x, source_height*factor_y), pygame.SRCALPHA)
+        else:
+            # Otherwise scale whole surface, relying on clipping when blitting to display
+            self.world_source_rect = None
+            self.world_buffer = pygame.Surface((target_width, target_height), pygame.SRCALPHA)
+
+    def _blit_world(self, source, scale, target):
+        """ Scales source by camera scale and blits it to target.
+
+        Args:
+            source (pygame.Surface): Surface containing level space rendering (required).
+            scale (tuple): x, y components of camera scale (required).
+            target (pygame.Surface): Display or frame of the same size to blit to (required).
+        """
+        if not tuple(scale) == self.world_scale:
+            self._rebuild_world(scale)
+
+        if not self.world_source_rect == None:
+            if not id(source) in self.world_sources:
+                self.world_sources[id(source)] = source.subsurface(self.world_source_rect)
+            source = self.world_sources[id(source)]
+
+        if self.world_buffer is None:
+            target.blit(source, (0, 0))
+        else:
+            pygame.transform.scale(source, self.world_buffer.get_size(), self.world_buffer)
+            target.blit(self.world_buffer, (0, 0))
+
+    def _blit_gui(self, source, target):
+        """ Fits source to display and blits it to target.
+
+        Args:
+            source (pygame.Surface): Surface containing gui space rendering (required).
+            target (pygame.Surface): Display or frame of the same size to blit to (required).
+        """
+        if self.gui_buffer is None:
+            target.blit(source, (0, 0))
+        else:
+            pygame.transform.scale(source, self.gui_buffer.get_size(), self.gui_buffer)
+            target.blit(self.gui_buffer, (0, 0))
+
+    def present_world(self, scale):
+        """ Scales level space rendering by camera scale and blits it to display.
+        When threaded rendering is copied and scaled by worker once frame is handed over.
+
+        Args:
+            scale (tuple): x, y components of camera scale (required).
+        """
+        if self.threaded:
+            # Scaling to the same size copies pixels exactly, unlike blitting which blends alpha
+            slot = self.slots[self.slot_index]
+            pygame.transform.scale(self.surface, self.surface.get_size(), slot["world"])
+            slot["world_scale"] = tuple(scale)
+        else:
+            self._blit_world(self.surface, scale, self.display)
+
+    def present_gui(self):
+        """ Fits gui space rendering to display and blits it to display.
+        When threaded rendering is copied and fitted by worker once frame is handed over.
+        """
+        if self.threaded:
+            pygame.transform.scale(self.surface, self.surface.get_size(), self.slots[self.slot_index]["gui"])
+        else:
+            self._blit_gui(self.surface, self.display)
+
+    def invalidate(self):
+        """ Forces whole display to be updated this frame and next, so anything drawn outside dirty rects is cleared """
+        self.full_update_frames = 2
+
+    def track_camera(self, position):
+        """ Invalidates display if camera moved since last frame, since all level rendering shifts.
+
+        Args:
+            position (pygame.Vector2): Camera position used to render current frame (required).
+        """
+        if not position == self.previous_camera_position:
+            self.invalidate()
+        self.previous_camera_position = pygame.Vector2(position)
+
+    def _add_dirty_rects(self, rects, factor):
+        """ Scales rectangles to display space and adds them to current frame's dirty rects.
+
+        Args:
+            rects ([pygame.Rect]): Rectangles in render surface space (required).
+            factor (tuple): x, y scale between render surface and display (required).
+        """
+        for rect in rects:
+            # Round outwards so partially covered display pixels are included
+            left, top = math.floor(rect[0]*factor[0]), math.floor(rect[1]*factor[1])
+            right, bottom = math.ceil((rect[0]+rect[2])*factor[0]), math.ceil((rect[1]+rect[3])*factor[1])
+            self.dirty_rects.append(pygame.Rect(left, top, right-left, bottom-top))
+
+    def add_world_rects(self, rects, scale):
+        """ Adds dirty rectangles rendered in level space, which are scaled by camera.
+
+        Args:
+            rects ([pygame.Rect]): Rectangles which have been rendered to (required).
+            scale (tuple): x, y components of camera scale (required).
+        """
+        if self.dirty_rects_enabled:
+            surface_width, surface_height = self.surface.get_size()
+            self._add_dirty_rects(rects, (
+                int(self.display.get_width()*scale[0]) / surface_width,
+                int(self.display.get_height()*scale[1]) / surface_height
+            ))
+
+    def add_gui_rects(self, rects):
+        """ Adds dirty rectangles rendered in gui space, which are fitted to display.
+
+        Args:
+            rects ([pygame.Rect]): Rectangles which have been rendered to (required).
+        """
+        if self.dirty_rects_enabled:
+            self._add_dirty_rects(rects, (
+                self.display.get_width() / self.surface.get_width(),
+                self.display.get_height() / self.surface.get_height()
+            ))
+
+    def _get_update_rects(self):
+        """ Determines parts of display to update this frame.
+        Returns list of rectangles to update, or None if whole display should be updated.
+        """
+        if not self.dirty_rects_enabled:
+            return None
+
+        # Parts of display drawn last frame must also be updated to erase them
+        display_rect = self.display.get_rect()
+        rects = [rect.clip(display_rect) for rect in merge_rects(self.dirty_rects + self.previous_dirty_rects)]
+        self.previous_dirty_rects = self.dirty_rects
+        self.dirty_rects = []
+
+        # Updating many small rects is slower than a single update so fallback when coverage is high
+        coverage = sum(rect.width*rect.height for rect in rects) / (display_rect.width*display_rect.height)
+        if self.full_update_frames > 0 or coverage > self.coverage_threshold:
+            if self.full_update_frames > 0:
+                self.full_update_frames -= 1
+            return None
+        return rects
+
+    def _flip(self, rects):
+        """ Updates display.
+
+        Args:
+            rects ([pygame.Rect]): Rectangles of display to update, whole display if None (required).
+        """
+        if rects == None:
+            if self.dirty_rects_enabled and Settings.DEBUG_DIRTY_RECTS:
+                pygame.draw.rect(self.display, (255, 0, 0), self.display.get_rect(), 2)
+            pygame.display.update()
+        else:
+            if Settings.DEBUG_DIRTY_RECTS:
+                for rect in rects:
+                    pygame.draw.rect(self.display, (255, 0, 255), rect, 1)
+            pygame.display.update(rects)
+
+    def update_display(self, callbacks=()):
+        """ Updates display, either entirely or only where rendering changed since last frame.
+        When threaded frame is handed to worker, waiting only if the previous frame hasn't been presented yet.
+
+        Args:
+            callbacks ([function]): Functions called with display after frame is presented eg. to draw console, when threaded waits for frame so only pass while they draw anything.
+        """
+        rects = self._get_update_rects()
+        if self.threaded:
+            # Keep at most one frame in flight, so slot being handed over is never still in use
+            self.wait()
+            self.job_done.clear()
+            # Callbacks run on main thread since they may use state it updates eg. console, so display is flipped once they are drawn over frame
+            should_flip = len(callbacks) == 0
+            self.jobs.put((self.slots[self.slot_index], rects, should_flip))
+            self.slot_index = (self.slot_index + 1) % len(self.slots)
+            if should_flip:
+                return
+            self.wait()
+
+        for callback in callbacks:
+            callback(self.display)
+        self._flip(rects)
+
+    def _present_jobs(self):
+        """ Worker thread loop which presents frames handed over by update_display """
+        while True:
+            job = self.jobs.get()
+            if job == None:
+                return
+            slot, rects, should_flip = job
+            try:
+                # World is only presented on frames where level was rendered
+                if not slot["world_scale"] == None:
+                    self._blit_world(slot["world"], slot["world_scale"], self.display)
+                    slot["world_scale"] = None
+                self._blit_gui(slot["gui"], self.display)
+                if should_flip:
+                    self._flip(rects)
+            except Exception as e:
+                self.worker_error = e
+            self.job_done.set()
+
+    def wait(self):
+        """ Blocks until any frame in flight has been presented, must be called before touching display when threaded """
+        self.job_done.wait()
+        # Surface errors from worker on main thread
+        if not self.worker_error == None:
+            error, self.worker_error = self.worker_error, None
+            raise error
+
+    def close(self):
+        """ Presents any frame in flight and stops worker thread """
+        self.wait()
+        if self.threaded:
+            self.jobs.put(None)
+            self.threaded = False
@@ -0,0 +1,125 @@
+import pygame, time, csv, math
+from collections import deque
+
+class Profiler():
+    """ Measures time spent in each stage of a frame, keeping a rolling history for averages and percentiles.
+    Stages are timed as laps, so each mark records time elapsed since the previous mark.
+
+    Args:
+        history (int): Number of frames kept for statistics and csv dumps.
+        stats_interval (int): Number of frames between recalculating displayed statistics.
+    """
+    def __init__(self, history=300, stats_interval=15):
+        self.frames = deque(maxlen=history)
+        self.stats_interval = stats_interval
+        self.stages = []
+        self.current_frame = None
+        self.lap_time = None
+
+        # Cached rendering of statistics, rebuilt every stats interval
+        self.stats = {}
+        self.frames_since_stats = stats_interval
+        self.overlay = None
+        self.font = None
+
+    def begin_frame(self):
+        """ Starts timing a new frame, discarding any unfinished frame """
+        self.current_frame = {}
+        self.lap_time = time.perf_counter()
+
+    def mark(self, stage):
+        """ Attributes time since previous mark to stage, accumulating if stage is marked multiple times in a frame.
+
+        Args:
+            stage (str): Name of stage which has just finished (required).
+        """
+        if self.current_frame == None:
+            return
+        now = time.perf_counter()
+        if not stage in self.current_frame:
+            self.current_frame[stage] = 0
+            # Remember order stages were first seen in so graph and csv columns are stable
+            if not stage in self.stages:
+                self.stages.append(stage)
+        self.current_frame[stage] += now - self.lap_time
+        self.lap_time = now
+
+    def end_frame(self):
+        """ Finishes timing current frame and adds it to history """
+        if self.current_frame == None:
+            return
+        self.frames.append(self.current_frame)
+        self.current_frame = None
+        self.frames_since_stats += 1
+
+    def get_stats(self):
+        """ Calculates average and 99th percentile time of each stage in milliseconds.
+        Returns dict of stage name to (average, p99) tuple, including "total".
+        """
+        stats = {}
+        if len(self.frames) == 0:
+            return stats
+        for stage in self.stages + ["total"]:
+            if stage == "total":
+                times = sorted(sum(frame.values()) for frame in self.frames)
+            else:
+                times = sorted(frame.get(stage, 0) for frame in self.frames)
+            p99 = times[min(len(times)-1, math.ceil(len(times)*0.99)-1)]
+            stats[stage] = (sum(times)/len(times)*1000, p99*1000)
+        return stats
+
+    def render(self, surface, position=(0, 0), bar_width=120, frame_budget=1/60):
+        """ Draws bar graph of stage averages with p99 markers, scaled so bar width is one frame budget.
+        Returns list of dirty rects which have been rendered to.
+
+        Args:
+            surface (pygame.Surface): Surface to render to (required).
+            position (tuple): Top left position of graph.
+            bar_width (int): Width in pixels of a full frame budget.
+            frame_budget (float): Seconds per frame which a full bar represents.
+        """
+        # Only rebuild graph periodically since text rendering is slow
+        if self.frames_since_stats >= self.stats_interval or self.overlay == None:
+            self.frames_since_stats = 0
+            self.stats = self.get_stats()
+            if self.font == None:
+                self.font = pygame.font.Font(None, 14)
+
+            line_height = self.font.get_linesize()
+            label_width = 90
+            self.overlay = pygame.Surface((label_width + bar_width + 110, line_height*max(len(self.stats), 1) + 4), pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 160))
+
+            budget_ms = frame_budget*1000
+            for i, (stage, (average, p99)) in enumerate(self.stats.items()):
+                y = 2 + i*line_height
+                self.overlay.blit(self.font.render(stage, False, (255, 255, 255)), (2, y))
+
+                # Average as bar and p99 as tick, both clamped to the budget width
+                average_width = min(int(average/budget_ms*bar_width), bar_width)
+                p99_x = label_width + min(int(p99/budget_ms*bar_width), bar_width)
+                color = (100, 200, 100) if not stage == "total" or average <= budget_ms else (220, 80, 80)
+                self.overlay.fill(color, (label_width, y+2, average_width, line_height-4))
+                self.overlay.fill((255, 200, 0), (p99_x, y, 1, line_height))
+
+                self.overlay.blit(self.font.render(f"{average:.2f} / {p99:.2f}ms", False, (255, 255, 255)), (label_width + bar_width + 4, y))
+            # Mark frame budget
+            self.overlay.fill((255, 255, 255), (label_width + bar_width, 0, 1, self.overlay.get_height()))
+
+        return [surface.blit(self.overlay, position)]
+
+    def dump_csv(self, filename, frames=None):
+        """ Writes stage times of recorded frames to csv in milliseconds, one row per frame.
+
+        Args:
+            filename (str): Path of csv file to write (required).
+            frames (int): Number of most recent frames to write, defaults to all recorded frames.
+        """
+        recorded = list(self.frames)
+        if not frames == None:
+            recorded = recorded[-frames:]
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame"] + self.stages + ["total"])
+            for i, frame in enumerate(recorded):
+                writer.writerow([i] + [f"{frame.get(stage, 0)*1000:.4f}" for stage in self.stages] + [f"{sum(frame.values())*1000:.4f}"])
@@ -0,0 +1,163 @@
+import pygame, json, gzip, random
+from Packages import Settings
+
+# Raw input events which are recorded, gui events are regenerated from these when replaying
+RECORDED_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.TEXTINPUT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION, pygame.MOUSEWHEEL)
+
+def serialize_event(event):
+    """ Converts event to a json serializable list of type and attributes, dropping attributes which can't be stored.
+
+    Args:
+        event (pygame.event.Event): Event to serialize (required).
+    """
+    attributes = {}
+    for name, value in event.dict.items():
+        if isinstance(value, (bool, int, float, str)):
+            attributes[name] = value
+        elif isinstance(value, tuple) and all(isinstance(a, (int, float)) for a in value):
+            attributes[name] = list(value)
+    return [event.type, attributes]
+
+def deserialize_event(data):
+    """ Converts list of type and attributes back into an event.
+
+    Args:
+        data (list): Serialized event as produced by serialize_event (required).
+    """
+    event_type, attributes = data
+    return pygame.event.Event(event_type, {name: tuple(value) if isinstance(value, list) else value for name, value in attributes.items()})
+
+class Recorder():
+    """ Records input events and frame times of gameloop so the exact same simulation can be replayed.
+    Saved replays are gzipped json.
+
+    Args:
+        level_name (str): Name of level recording starts in (required).
+        seed (int): Seed of random number generator, randomly chosen if None.
+        checksum_interval (int): Number of frames between recording player position to verify replays.
+    """
+    def __init__(self, level_name, seed=None, checksum_interval=60):
+        self.level_name = level_name
+        self.seed = seed if not seed == None else random.randrange(2**32)
+        self.checksum_interval = checksum_interval
+        self.frames = []
+        self.checksums = {}
+
+    def start(self, level):
+        """ Seeds random number generator and loads starting level, must be called before first frame.
+
+        Args:
+            level (Level.Level): Level to load starting level into (required).
+        """
+        # Start cold so levels are loaded the same way each run
+        Settings.level_cache.clear()
+        level.prefetcher.clear(wait=True)
+        random.seed(self.seed)
+        level.load_fresh(self.level_name)
+
+    def get_events(self):
+        """ Gets events from pygame, recording input events for current frame """
+        events = pygame.event.get()
+        self.frames.append([0, [serialize_event(event) for event in events if event.type in RECORDED_EVENTS]])
+        return events
+
+    def frame_delta(self, delta):
+        """ Records time used for current frame.
+        Returns delta unchanged.
+
+        Args:
+            delta (float): Seconds the current frame simulates (required).
+        """
+        self.frames[-1][0] = delta
+        return delta
+
+    def end_frame(self, level):
+        """ Periodically records player position as checksum of simulation.
+
+        Args:
+            level (Level.Level): Level being simulated (required).
+        """
+        if len(self.frames) % self.checksum_interval == 0:
+            self.checksums[str(len(self.frames))] = [level.player.position.x, level.player.position.y]
+
+    def save(self, filename):
+        """ Writes recording to disk.
+
+        Args:
+            filename (str): Path of replay file (required).
+        """
+        with gzip.open(filename, "wt") as file:
+            json.dump({
+                "version": 1,
+                "level": self.level_name,
+                "seed": self.seed,
+                "checksum_interval": self.checksum_interval,
+                "frames": self.frames,
+                "checksums": self.checksums,
+            }, file, separators=(",", ":"))
+
+class Replayer():
+    """ Feeds recorded input events and frame times back into gameloop, verifying simulation matches recording.
+
+    Args:
+        filename (str): Path of replay file written by Recorder (required).
+    """
+    def __init__(self, filename):
+        with gzip.open(filename, "rt") as file:
+            json_data = json.load(file)
+        self.level_name = json_data["level"]
+        self.seed = json_data["seed"]
+        self.checksum_interval = json_data["checksum_interval"]
+        self.frames = json_data["frames"]
+        self.checksums = json_data["checksums"]
+
+        self.frame = 0
+        # First frame where simulation no longer matched recording, None if matching
+        self.diverged_frame = None
+
+    def get_frame_count(self):
+        """ Getter for number of recorded frames """
+        return len(self.frames)
+
+    def start(self, level):
+        """ Seeds random number generator and loads starting level, must be called before first frame.
+
+        Args:
+            level (Level.Level): Level to load starting level into (required).
+        """
+        self.frame = 0
+        self.diverged_frame = None
+        # Start cold so levels are loaded the same way each run
+        Settings.level_cache.clear()
+        level.prefetcher.clear(wait=True)
+        random.seed(self.seed)
+        level.load_fresh(self.level_name)
+
+    def get_events(self):
+        """ Gets recorded events for current frame, passing through gui and quit events from pygame """
+        events = [event for event in pygame.event.get() if event.type >= pygame.USEREVENT or event.type == pygame.QUIT]
+        if self.frame < len(self.frames):
+            events += [deserialize_event(event) for event in self.frames[self.frame][1]]
+        self.frame += 1
+        return events
+
+    def frame_delta(self, delta):
+        """ Gets recorded time of current frame, ignoring measured time.
+
+        Args:
+            delta (float): Measured seconds of current frame (required).
+        """
+        if self.frame-1 < len(self.frames):
+            return self.frames[self.frame-1][0]
+        return delta
+
+    def end_frame(self, level):
+        """ Compares player position against recorded checksum, noting first frame which differs.
+
+        Args:
+            level (Level.Level): Level being simulated (required).
+        """
+        checksum = self.checksums.get(str(self.frame))
+        if not checksum == None and self.diverged_frame == None:
+            if not checksum == [level.player.position.x, level.player.position.y]:
+                self.diverged_frame = self.frame
@@ -1,6 +1,7 @@
 from Packages.Extern import SoundPlayer
-from Packages import Camera, Gui
+from Packages import Camera, Gui, Presentation, Profiler, LevelAssets, Preloader
 import pygame, os, pygame_gui, json, platform, string, pickle
+from concurrent.futures import ThreadPoolExecutor
 
 if platform.system() == "Windows":
     # For windows to get window rect
@@ -24,15 +25,31 @@ def get_window_rect():
         return None
 
 
-def init():
-    """ Initialize global variables """
+# Set once init has run so modules importing main can initialize settings themselves first
+initialized = False
+
+def init(null_audio=False):
+    """ Initialize global variables
+
+    Args:
+        null_audio (bool): Flag to load silent sound players instead of opening audio devices.
+    """
+    global initialized, NULL_AUDIO
+    initialized = True
+    NULL_AUDIO = null_audio
     # Setup constants
-    global DEBUG, TRANSITION_MAX_FRAMES, DEBUG_DIRTY_RECTS, PLAYER_HEARTS, SELECTED_SAVE, DEFAULT_SAVE, CACHE
+    global DEBUG, TRANSITION_MAX_FRAMES, DEBUG_DIRTY_RECTS, DIRTY_RECTS, DIRTY_RECTS_COVERAGE_THRESHOLD, PLAYER_HEARTS, SELECTED_SAVE, DEFAULT_SAVE, CACHE
     PLAYER_HEARTS = 5
     TRANSITION_MAX_FRAMES = 30
     DEBUG = False
     CACHE = True
     DEBUG_DIRTY_RECTS = False
+    # Only update changed parts of display, falls back to full updates above coverage threshold
+    DIRTY_RECTS = False
+    DIRTY_RECTS_COVERAGE_THRESHOLD = 0.5
+    # Scale and flip frames on a worker thread while next frame is simulated, adds up to a frame of latency
+    global PRESENT_THREADED
+    PRESENT_THREADED = False
     SELECTED_SAVE = 0
     DEFAULT_SAVE = {
         "title_info": {
@@ -46,6 +63,62 @@ def init():
         "name":"",
         "challenges":[],
     }
+
+    # Setup fixed timestep simulation, physics always advances in steps of PHYSICS_STEP
+    global PHYSICS_STEP, MAX_PHYSICS_STEPS, MAX_FRAME_TIME, FPS_CAP
+    PHYSICS_STEP = 1/60
+    # Limit steps per frame and clamp frame time so slow frames cant cause a spiral of death
+    MAX_PHYSICS_STEPS = 5
+    MAX_FRAME_TIME = 0.25
+    # Rendered frames are interpolated between physics steps so frame rate can exceed physics rate, 0 is uncapped
+    FPS_CAP = 60
+    # Seconds used as every frame's delta instead of measured time when set, makes runs repeatable
+    global FIXED_FRAME_DELTA
+    FIXED_FRAME_DELTA = None
+
+    # Level layers are stored as square chunks of this size, dropping empty chunks
+    global LEVEL_CHUNK_SIZE
+    LEVEL_CHUNK_SIZE = 256
+
+    # Decoded level assets are kept across transitions, evicting least recently used levels over budget
+    global LEVEL_CACHE_BUDGET, level_cache
+    LEVEL_CACHE_BUDGET = 256*1024*1024
+    level_cache = LevelAssets.LevelCache(LEVEL_CACHE_BUDGET)
+
+    # Decode levels reachable from the current level in the background, finishing them within a time budget each frame
+    global PREFETCH_LEVELS, PREFETCH_FRAME_BUDGET
+    PREFETCH_LEVELS = True
+    PREFETCH_FRAME_BUDGET = 0.002
+    # Merge adjacent and overlapping physical colliders of levels when decoding, covering the same area with fewer rectangles
+    global MERGE_COLLIDERS
+    MERGE_COLLIDERS = True
+    # Size of spatial hash cells static level colliders are bucketed into, in level pixels
+    global COLLISION_CELL_SIZE
+    COLLISION_CELL_SIZE = 64
+    # Rasterise solid level colliders into a grid of tiles the size levels are authored with in Tiled, answering floor probes
+    global TILE_GRID_COLLISION, COLLISION_TILE_SIZE
+    TILE_GRID_COLLISION = True
+    COLLISION_TILE_SIZE = 16
+    # Move every enemy of a level at once using numpy when available, once a level has at least this many enemies
+    global BATCH_ENEMY_PHYSICS, BATCH_ENEMY_PHYSICS_MIN
+    BATCH_ENEMY_PHYSICS = True
+    BATCH_ENEMY_PHYSICS_MIN = 12
+
+    # Threads decoding layer pngs of a level concurrently, a single worker decodes them one at a time
+    global LEVEL_DECODE_WORKERS, level_decoder
+    LEVEL_DECODE_WORKERS = min(4, os.cpu_count() or 1)
+    level_decoder = ThreadPoolExecutor(max_workers=LEVEL_DECODE_WORKERS, thread_name_prefix="LevelDecode") if LEVEL_DECODE_WORKERS > 1 else None
+    # Seconds per frame spent preparing the next level while fading out of a transition
+    global LEVEL_LOAD_FRAME_BUDGET
+    LEVEL_LOAD_FRAME_BUDGET = 0.004
+    # Dialog text boxes are built once player is within this distance of their trigger, in level pixels
+    global DIALOG_WARM_DISTANCE
+    DIALOG_WARM_DISTANCE = 96
+
+    # Time stages of each frame, graphed in debug mode
+    global PROFILER_HISTORY, profiler
+    PROFILER_HISTORY = 300
+    profiler = Profiler.Profiler(history=PROFILER_HISTORY)
     
     # Load user settings and saves
     global SAVE_FILETEMPLATE, SRC_DIRECTORY, USER_SETTINGS, USER_SETTINGS_PATH, RESOLUTION, RESOLUTION_STR
@@ -53,6 +126,9 @@ def init():
     SRC_DIRECTORY = str(os.path.join(os.path.dirname(os.path.dirname(__file__)), "")).replace("\\", "/")
     USER_SETTINGS_PATH = SRC_DIRECTORY + "user_settings.json"
     SAVE_FILETEMPLATE = string.Template(SRC_DIRECTORY + "Saves/save$num.json")
+    # Frame timings are written here by pressing F3 in debug mode
+    global PROFILE_DUMP_FILENAME
+    PROFILE_DUMP_FILENAME = SRC_DIRECTORY + "profile.csv"
     try:
         with open(USER_SETTINGS_PATH) as json_file:
                 USER_SETTINGS = json.load(json_file)
@@ -80,14 +156,17 @@ def init():
     RESOLUTION = (int(RESOLUTION_STR.split('x')[0]), int(RESOLUTION_STR.split('x')[1]))
     
     # Setup pygame and display
-    global surface, clock, camera, true_surface, window_rect, is_fullscreen
+    global surface, clock, camera, true_surface, window_rect, is_fullscreen, presenter
     pygame.init()
     icon = pygame.image.load(SRC_DIRECTORY + "UI/logo.png")
     pygame.display.set_icon(icon)
     pygame.display.set_caption("Ascendant")
 
-    # Set cursor type from file
-    pygame.mouse.set_cursor(*pygame.cursors.load_xbm(SRC_DIRECTORY + "UI/cursor.xbm", SRC_DIRECTORY + "UI/cursor_mask.xbm"))
+    # Set cursor type from file, headless video drivers dont support cursors
+    try:
+        pygame.mouse.set_cursor(*pygame.cursors.load_xbm(SRC_DIRECTORY + "UI/cursor.xbm", SRC_DIRECTORY + "UI/cursor_mask.xbm"))
+    except pygame.error:
+        pass
 
     # Set screen size and fullscreen properties from user settings
     info = pygame.display.Info()
@@ -102,9 +181,24 @@ def init():
     surface = pygame.Surface(RESOLUTION, flags=pygame.SRCALPHA)
     window_rect = get_window_rect()
 
+    # Preallocate buffers for scaling surface to true surface
+    presenter = Presentation.Presenter(true_surface, surface, dirty_rects=DIRTY_RECTS, coverage_threshold=DIRTY_RECTS_COVERAGE_THRESHOLD, threaded=PRESENT_THREADED)
+
     clock = pygame.time.Clock()
     camera = Camera.Camera(position=pygame.Vector2(-1000,-400), max_move_speed=30, max_offset=pygame.Vector2(0.1,0.02), contraints_min=pygame.Vector2(0,0), scale=(2,2))
     
+    # Decode images and sounds on a pool of threads behind a progress splash, only converting images on the main thread
+    global preloader
+    preloader = Preloader.Preloader()
+    preloader.preload_images([SRC_DIRECTORY + "UI", SRC_DIRECTORY + "Entities"])
+    with open(SRC_DIRECTORY + "Sound/sounds.json") as json_file:
+        sounds_json_data = json.load(json_file)
+    # Sounds are only decoded when they won't be loaded from cache
+    if not NULL_AUDIO and not (CACHE and os.path.exists(SRC_DIRECTORY+".cache/music.p") and os.path.exists(SRC_DIRECTORY+".cache/sound_effects.p")):
+        for sounds in sounds_json_data["sound_effects"] + sounds_json_data["music"]:
+            preloader.submit(("sound", SRC_DIRECTORY + sounds["filename"]), SoundPlayer.decode, SRC_DIRECTORY + sounds["filename"])
+    preloader.wait(true_surface)
+
     # Setup GUI with all the spritesheets
     global gui_manager, gui
     # Set theme of pygame gui which changes fonts and design
@@ -129,11 +223,19 @@ def init():
     global MUSIC, SOUND_EFFECTS, MUSIC_VOLUMES, SOUND_EFFECTS_VOLUMES
 
     should_cache = False
-    with open(SRC_DIRECTORY + "Sound/sounds.json") as json_file:
-        json_data = json.load(json_file)
+    json_data = sounds_json_data
 
+    # Give every sound a silent player without touching audio devices or cache
+    if NULL_AUDIO:
+        MUSIC, MUSIC_VOLUMES, SOUND_EFFECTS, SOUND_EFFECTS_VOLUMES = {}, {}, {}, {}
+        for sounds in json_data["music"]:
+            MUSIC[sounds["name"]] = SoundPlayer.NullSoundPlayer(SRC_DIRECTORY + sounds["filename"])
+            MUSIC_VOLUMES[sounds["name"]] = sounds["volume"]
+        for sounds in json_data["sound_effects"]:
+            SOUND_EFFECTS[sounds["name"]] = SoundPlayer.NullSoundPlayer(SRC_DIRECTORY + sounds["filename"])
+            SOUND_EFFECTS_VOLUMES[sounds["name"]] = sounds["volume"]
     # If music cache already exists attempt to load it
-    if CACHE:
+    elif CACHE:
         if (os.path.exists(SRC_DIRECTORY+".cache/music.p") and 
             os.path.exists(SRC_DIRECTORY+".cache/sound_effects.p")):
             if DEBUG:
@@ -153,12 +255,12 @@ def init():
             # Reload sounds from file if loading cache failed
             should_cache = True
     # Loading music from file if required or no chaching used
-    if not CACHE or should_cache:
+    if not NULL_AUDIO and (not CACHE or should_cache):
         SOUND_EFFECTS = {}
         SOUND_EFFECTS_VOLUMES = {}
         # Use json file to get filename and volume, construct soundplayer object and then cache
         for sounds in json_data["sound_effects"]:
-            SOUND_EFFECTS[sounds["name"]] = SoundPlayer.SoundPlayer(SRC_DIRECTORY + sounds["filename"])
+            SOUND_EFFECTS[sounds["name"]] = SoundPlayer.SoundPlayer(SRC_DIRECTORY + sounds["filename"], pydubfile=preloader.take(("sound", SRC_DIRECTORY + sounds["filename"])))
             SOUND_EFFECTS_VOLUMES[sounds["name"]] = sounds["volume"]
 
             # Turn off sound effects by settings volume to zero
@@ -170,7 +272,7 @@ def init():
         MUSIC = {}
         MUSIC_VOLUMES = {}
         for sounds in json_data["music"]:
-            MUSIC[sounds["name"]] = SoundPlayer.SoundPlayer(SRC_DIRECTORY + sounds["filename"])
+            MUSIC[sounds["name"]] = SoundPlayer.SoundPlayer(SRC_DIRECTORY + sounds["filename"], pydubfile=preloader.take(("sound", SRC_DIRECTORY + sounds["filename"])))
             MUSIC_VOLUMES[sounds["name"]] = sounds["volume"]
 
             # Turn off music by settings volume to zero
@@ -3,21 +3,61 @@ import pygame, json, copy
 # For debugging
 from Packages import Settings
 
+def blit_visible(surface, image, position, view, special_flags=0):
+    """ Blits only the part of image which lies within view, so cost depends on view size rather than image size.
+    Returns list of dirty rects which have been rendered to.
+
+    Args:
+        surface (pygame.Surface): Surface to render to (required).
+        image (pygame.Surface): Image to render (required).
+        position (pygame.Vector2): Position to render image at (required).
+        view (pygame.Rect): Rectangle of surface which is visible (required).
+        special_flags (int): Blend flags image is blitted with.
+    """
+    # Truncate position the same way blit does so cropped image lines up with a full blit
+    x, y = int(position[0]), int(position[1])
+    area = view.move(-x, -y).clip(image.get_rect())
+    if area.width == 0 or area.height == 0:
+        return []
+    return [surface.blit(image, (x+area.x, y+area.y), area=area, special_flags=special_flags)]
+
+def premultiply_alpha(image):
+    """ Returns copy of image with color channels multiplied by alpha, for blitting with pygame.BLEND_PREMULTIPLIED.
+
+    Args:
+        image (pygame.Surface): Image with per pixel alpha (required).
+    """
+    # Surface.premul_alpha only exists in newer pygame releases
+    if hasattr(image, "premul_alpha"):
+        return image.premul_alpha()
+
+    # Alpha blending image over opaque black scales color by alpha
+    premultiplied = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+    premultiplied.fill((0, 0, 0, 255))
+    premultiplied.blit(image, (0, 0))
+    # Then restore alpha by multiplying with white copy of image
+    mask = image.copy()
+    mask.fill((255, 255, 255, 0), special_flags=pygame.BLEND_RGBA_MAX)
+    premultiplied.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    return premultiplied
+
 class ImageSprite():
     """ General class for loading and rendering an image.
     
     Args:
         image_filename (str): File path of image to be loaded.
         scale (tuple): x, y componenets to scale image by.
+        special_flags (int): Blend flags image is blitted with eg. pygame.BLEND_PREMULTIPLIED.
     """
-    def __init__(self, image_filename=None,scale=None):
+    def __init__(self, image_filename=None,scale=None, special_flags=0):
         # Make image hideable
         self.hidden=False
+        self.special_flags = special_flags
 
         # Attempt to load file
         if not image_filename == None:
             try:
-                self.image = pygame.image.load(image_filename).convert_alpha()
+                self.image = Settings.preloader.load_image(image_filename)
             except FileNotFoundError:
                 print("Invalid sprite image: ", image_filename)
         # Scale each component
@@ -37,9 +77,22 @@ class ImageSprite():
         if not self.hidden:
             # Apply optional size and return dirty rect
             if size == None: 
-                return [surface.blit(self.image, position)]
+                return [surface.blit(self.image, position, special_flags=self.special_flags)]
             else:
-                return [surface.blit(self.image, position, area=size)]
+                return [surface.blit(self.image, position, area=size, special_flags=self.special_flags)]
+        return []
+    def render_visible(self, surface, view, position=pygame.Vector2(0,0)):
+        """ Draws part of image sprite which lies within view to surface at position.
+        Returns list of dirty rects which have been rendered to.
+
+        Args:
+            surface (pygame.Surface): Surface to render to (required).
+            view (pygame.Rect): Rectangle of surface which is visible (required).
+            position (pygame.Vector2): Position to render image at.
+        """
+        if not self.hidden:
+            return blit_visible(surface, self.image, position, view, self.special_flags)
+        return []
     def hide(self):
         """ Hides image so it isnt rendered """
         self.hidden = True
@@ -57,6 +110,109 @@ class ImageSprite():
                 copyobj.__dict__[name] = copy.deepcopy(attr)
         return copyobj
 
+class ChunkedImageSprite():
+    """ Stores a large image as fixed size chunks, skipping fully transparent chunks and storing fully opaque chunks without alpha.
+
+    Args:
+        image (pygame.Surface): Image to split into chunks.
+        chunk_size (int): Width and height of each chunk in pixels.
+        special_flags (int): Blend flags partially transparent chunks are blitted with eg. pygame.BLEND_PREMULTIPLIED.
+        convert (bool): Whether to convert chunks to display format immediately.
+    """
+    def __init__(self, image=None, chunk_size=256, special_flags=0, convert=True):
+        self.hidden = False
+        self.size = (0, 0)
+        self.chunks = []
+        if not image == None:
+            self.load_chunks(image, chunk_size, special_flags, convert)
+
+    def load_chunks(self, image, chunk_size, special_flags=0, convert=True):
+        """ Splits image into chunks, replacing any existing chunks.
+        Without converting, chunks can be split on any thread but must be converted with convert_chunks before rendering quickly.
+
+        Args:
+            image (pygame.Surface): Image to split into chunks (required).
+            chunk_size (int): Width and height of each chunk in pixels (required).
+            special_flags (int): Blend flags partially transparent chunks are blitted with.
+            convert (bool): Whether to convert chunks to display format immediately.
+        """
+        self.size = image.get_size()
+        self.chunks = []
+        for y in range(0, self.size[1], chunk_size):
+            for x in range(0, self.size[0], chunk_size):
+                rect = pygame.Rect(x, y, chunk_size, chunk_size).clip(image.get_rect())
+                chunk = image.subsurface(rect)
+
+                # Skip chunks without any visible pixels
+                if pygame.mask.from_surface(chunk, 0).count() == 0:
+                    continue
+                if pygame.mask.from_surface(chunk, 254).count() == rect.width*rect.height:
+                    # Opaque chunks simply overwrite, so dont need alpha or blend flags
+                    self.chunks.append({"rect": rect, "image": chunk.copy(), "special_flags": 0, "opaque": True, "converted": False})
+                else:
+                    self.chunks.append({"rect": rect, "image": chunk.copy(), "special_flags": special_flags, "opaque": False, "converted": False})
+        if convert:
+            for _ in self.convert_chunks():
+                pass
+
+    def convert_chunks(self):
+        """ Generator which converts unconverted chunks to display format, yielding after each chunk so work can be spread across frames.
+        Must be run on the main thread once display mode is set.
+        """
+        for chunk in self.chunks:
+            if not chunk["converted"]:
+                chunk["image"] = chunk["image"].convert() if chunk["opaque"] else chunk["image"].convert_alpha()
+                chunk["converted"] = True
+                yield
+
+    def get_size(self):
+        """ Getter for size of original image """
+        return self.size
+
+    def render(self, surface, position=pygame.Vector2(0,0)):
+        """ Draws every chunk to surface at position.
+        Returns list of dirty rects which have been rendered to.
+
+        Args:
+            surface (pygame.Surface): Surface to render to (required).
+            position (pygame.Vector2): Position to render image at.
+        """
+        return self.render_visible(surface, surface.get_rect(), position)
+
+    def render_visible(self, surface, view, position=pygame.Vector2(0,0)):
+        """ Draws chunks which lie within view to surface at position.
+        Returns list of dirty rects which have been rendered to.
+
+        Args:
+            surface (pygame.Surface): Surface to render to (required).
+            view (pygame.Rect): Rectangle of surface which is visible (required).
+            position (pygame.Vector2): Position to render image at.
+        """
+        dirty_rects = []
+        if not self.hidden:
+            # Truncate once so chunks line up exactly as the original image would
+            x, y = int(position[0]), int(position[1])
+            local_view = view.move(-x, -y)
+            for chunk in self.chunks:
+                if chunk["rect"].colliderect(local_view):
+                    dirty_rects += blit_visible(surface, chunk["image"], (x+chunk["rect"].x, y+chunk["rect"].y), view, chunk["special_flags"])
+        return dirty_rects
+    def hide(self):
+        """ Hides image so it isnt rendered """
+        self.hidden = True
+    def show(self):
+        """ Shows image so it is rendered """
+        self.hidden = False
+    def copy(self):
+        """ Standard copy constructor for complex objects """
+        copyobj = ChunkedImageSprite()
+        for name, attr in self.__dict__.items():
+            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+                copyobj.__dict__[name] = attr.copy()
+            else:
+                copyobj.__dict__[name] = copy.deepcopy(attr)
+        return copyobj
+
 class ImageSpriteSheet():
     """ General class for loading a sprite sheet from file and displaying specific frames 
     
@@ -83,7 +239,7 @@ class ImageSpriteSheet():
 
         # Attempt to load image given by json
         try:
-            self.spritesheet_image = pygame.image.load(Settings.SRC_DIRECTORY+json_data["filename"]).convert_alpha()
+            spritesheet_image = Settings.preloader.load_image(Settings.SRC_DIRECTORY+json_data["filename"])
         except FileNotFoundError:
             print('Unable to load spritesheet image:', json_data["filename"])
 
@@ -99,7 +255,7 @@ class ImageSpriteSheet():
             image = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
 
             # Crop spritesheet onto image and scale
-            image.blit(self.spritesheet_image, (0, 0), rect)
+            image.blit(spritesheet_image, (0, 0), rect)
             image = pygame.transform.scale(image, (int(x_size*scale[0]), int(y_size*scale[1])))
 
             # Save new image under correct name
@@ -133,6 +289,121 @@ class ImageSpriteSheet():
         return copyobj
 
 
+# Loaded animation clips keyed by spritesheet json filename, scale and which extra frames were calculated
+animation_clips_cache = {}
+
+def load_animation_clips(spritesheet_json_filename, scale=(1, 1), calculate_flip=False, calculate_white=False):
+    """ Gets animation clips for spritesheet, loading them only the first time each combination of options is requested.
+    Returns shared AnimationClips which must not be modified.
+
+    Args:
+        spritesheet_json_filename (str): File path of json which describes frames to be loaded (required).
+        scale (tuple): x, y componenets to scale spritesheet by.
+        calculate_flip (bool): Flag which determines whether a flipped copy of animations are stored.
+        calculate_white (bool): Flag which determines whether a white copy of animations are stored.
+    """
+    key = (spritesheet_json_filename, tuple(scale), calculate_flip, calculate_white)
+    if not key in animation_clips_cache:
+        animation_clips_cache[key] = AnimationClips(spritesheet_json_filename, scale, calculate_flip, calculate_white)
+    return animation_clips_cache[key]
+
+class AnimationClips():
+    """ Read only frames and timings of every animation in a spritesheet, shared between all sprites playing them.
+    
+    Args:
+        spritesheet_json_filename (str): Path of json file describing animations for spritesheet.
+        scale (tuple): x, y components to scale animation sizes by.
+        calculate_flip (bool): Flag which determines whether a flipped copy of animations are stored.
+        calculate_white (bool): Flag which determines whether a white copy of animations are stored.
+    """
+    def __init__(self, spritesheet_json_filename=None, scale=(1, 1), calculate_flip=False, calculate_white=False):
+        # List of dicts with name, time, frame_length and lists of frames
+        self.animations = []
+        if not spritesheet_json_filename == None:
+            self.load(spritesheet_json_filename, scale, calculate_flip, calculate_white)
+
+    def load(self, spritesheet_json_filename, scale=(1, 1), calculate_flip=False, calculate_white=False):
+        """ Loads and slices every animation frame from json file describing animations.
+
+        Args:
+            spritesheet_json_filename (str): File path of json which describes frames to be loaded (required).
+            scale (tuple): x, y componenets to scale spritesheet by.
+            calculate_flip (bool): Flag which determines whether a flipped copy of animations are stored.
+            calculate_white (bool): Flag which determines whether a white copy of animations are stored.
+        """
+
+        self.animations = []
+
+        with open(spritesheet_json_filename) as json_file:
+            json_data = json.load(json_file)
+
+        # Attempt to load image given by json file with transparency
+        try:
+            spritesheet_image = Settings.preloader.load_image(Settings.SRC_DIRECTORY+json_data["filename"])
+        except:
+            print('Unable to load spritesheet image:', json_data["filename"])
+
+        # Load each animation
+        for animation in json_data["animations"]:
+            x_init_offset = animation["x_init_offset"]
+            y_init_offset = animation["y_init_offset"]
+            x_size = animation["x_size"]
+            y_size = animation["y_size"]
+            x_offset = animation["x_offset"]
+            y_offset = animation["y_offset"]
+            time = animation["time"]
+            frame_length = animation["frame_length"]
+
+            x = x_init_offset
+            y = y_init_offset
+
+            # Setup animation data dictionary
+            animation_data = {"name": animation["name"], "time": time, "frame_length": frame_length, "frames":[]}
+
+            # Add each extra type of frame as necessary
+            if calculate_flip:
+                animation_data["frames_flipped"] = []
+            if calculate_white:
+                animation_data["frames_white"] = []
+                if calculate_flip:
+                    animation_data["frames_white_flipped"] = []
+
+            # Load each frame for animation
+            for _ in range(frame_length):
+                # Create new transparent surface of correct size
+                rect = pygame.Rect((x, y, x_size, y_size))
+                image = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
+
+                # Crop spritesheet onto image and scale
+                image.blit(spritesheet_image, (0, 0), rect)
+                image = pygame.transform.scale(image, (int(x_size*scale[0]), int(y_size*scale[1])))
+
+                # Save image as frame and advance x, y offset in spritesheet
+                x += x_offset
+                y += y_offset
+                animation_data["frames"].append(image)
+                # Create other types of frames
+                if calculate_flip:
+                    # Flip about vertical axis
+                    animation_data["frames_flipped"].append(pygame.transform.flip(image, True, False))
+                if calculate_white:
+                    white_image = image.copy()
+                    # Set all fully opaque pixels within image to white using a mask of them, leaving other pixels unchanged
+                    opaque_mask = pygame.mask.from_surface(image, 254)
+                    white_image.blit(opaque_mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0)), (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                    # Add white frame and calculate flipped white
+                    animation_data["frames_white"].append(white_image)
+                    if calculate_flip:
+                        # Flip about vertical axis
+                        animation_data["frames_white_flipped"].append(pygame.transform.flip(white_image, True, False))
+            
+            # Add animation
+            self.animations.append(animation_data)
+
+    def copy(self):
+        """ Clips are never modified so copies share the same clips """
+        return self
+
 class AnimatedSprite():
     """ General class for handling loading, rendering and updating animations from a spritesheet.
     
@@ -143,6 +414,9 @@ class AnimatedSprite():
         calculate_flip (bool): Flag which determines whether a flipped copy of animations are stored.
         calculate_white (bool): Flag which determines whether a white copy of animations are stored.
     """
+    # Attributes referencing read only animation data, shared rather than copied between sprites
+    SHARED_ATTRIBUTES = ("clips", "animations_data", "frame_image")
+
     def __init__(self, position = pygame.Vector2(0, 0), spritesheet_json_filename = None, spritesheet_scale=(1,1), calculate_flip=False, calculate_white=False, *args, **kwargs):
         # Setup state
         self.hidden = False
@@ -156,13 +430,17 @@ class AnimatedSprite():
         # User specified functions which self is passed to
         self.on_animation_end = lambda self: 1
         self.on_animation_interrupt = lambda self: 1
+        # Shared clips and their list of animations, only playback state belongs to each sprite
+        self.clips = None
         self.animations_data = None
-        self.spritesheet_image = None
         self.flipX = False
         self.is_white = False
         self.frame_num = 0
         self.speed = 1
         self.frame_image = None
+        # Position before last physics step and offset applied when rendering between steps
+        self.previous_step_position = None
+        self.interpolation_offset = pygame.Vector2(0, 0)
 
         if not spritesheet_json_filename == None:
             self.load_spritesheet(spritesheet_json_filename, spritesheet_scale, calculate_flip=calculate_flip, calculate_white=calculate_white)
@@ -172,6 +450,21 @@ class AnimatedSprite():
     def show(self):
         """ Shows image so it is rendered """
         self.hidden = False
+    def save_physics_state(self):
+        """ Saves position before a physics step so rendering can interpolate between steps """
+        self.previous_step_position = pygame.Vector2(self.position)
+
+    def interpolate(self, alpha):
+        """ Offsets rendering to lie between position before and after the last physics step.
+
+        Args:
+            alpha (float): Fraction of a physics step elapsed since last step, between 0 and 1 (required).
+        """
+        if self.previous_step_position == None:
+            self.interpolation_offset = pygame.Vector2(0, 0)
+        else:
+            self.interpolation_offset = (self.previous_step_position - self.position) * (1 - alpha)
+
     def update_animation(self, delta):
         """ Update frame position in current animation, if one is playing.
 
@@ -198,6 +491,8 @@ class AnimatedSprite():
                     self.animation_playing = False
                     self.animation_finished = True
                     self.on_animation_end(self)
+                    # Callback may play another animation or reset sprite in place, so take frame from whichever animation is now current
+                    current_animation = self.animations_data[self.animation_index]
         # Get type of frame from 4 permutations and set correct frame
         frame_type = ["frames", "frames_flipped", "frames_white", "frames_white_flipped"][self.flipX + 2*self.is_white]
         self.frame_image = current_animation[frame_type][self.frame_num]
@@ -219,18 +514,18 @@ class AnimatedSprite():
 
             # Check if sprite needs to be drawn
             if not self.frame_image == None:
-                relative_position = self.position + offset
+                relative_position = self.position + offset + self.interpolation_offset
                 # Only draw if frame lies within screen
                 if relative_position.x + self.frame_image.get_width() > 0 and relative_position.x <= Settings.RESOLUTION[0] and relative_position.y + self.frame_image.get_height() > 0 and relative_position.y <= Settings.RESOLUTION[1]:
                     if size == None: 
-                        return [surface.blit(self.frame_image, self.position + offset)]
+                        return [surface.blit(self.frame_image, relative_position)]
                     else:
-                        return [surface.blit(self.frame_image, self.position + offset, size)]
+                        return [surface.blit(self.frame_image, relative_position, size)]
         
         return []
 
     def load_spritesheet(self, spritesheet_json_filename, scale=(1, 1), calculate_flip=False, calculate_white=False):
-        """ Loads spritesheet animation into memory from json file describing animations.
+        """ Loads spritesheet animations, sharing clips with every other sprite using the same spritesheet json and options.
 
         Args:
             spritesheet_json_filename (str): File path of json which describes frames to be loaded (required).
@@ -238,77 +533,8 @@ class AnimatedSprite():
             calculate_flip (bool): Flag which determines whether a flipped copy of animations are stored.
             calculate_white (bool): Flag which determines whether a white copy of animations are stored.
         """
-
-        self.animations_data = []
-
-        with open(spritesheet_json_filename) as json_file:
-            json_data = json.load(json_file)
-
-        # Attempt to load image given by json file with transparency
-        try:
-            self.spritesheet_image = pygame.image.load(Settings.SRC_DIRECTORY+json_data["filename"]).convert_alpha()
-        except:
-            print('Unable to load spritesheet image:', json_data["filename"])
-
-        # Load each animation
-        for animation in json_data["animations"]:
-            x_init_offset = animation["x_init_offset"]
-            y_init_offset = animation["y_init_offset"]
-            x_size = animation["x_size"]
-            y_size = animation["y_size"]
-            x_offset = animation["x_offset"]
-            y_offset = animation["y_offset"]
-            time = animation["time"]
-            frame_length = animation["frame_length"]
-
-            x = x_init_offset
-            y = y_init_offset
-
-            # Setup animation data dictionary
-            animation_data = {"name": animation["name"], "time": time, "frame_length": frame_length, "frames":[]}
-
-            # Add each extra type of frame as necessary
-            if calculate_flip:
-                animation_data["frames_flipped"] = []
-            if calculate_white:
-                animation_data["frames_white"] = []
-                if calculate_flip:
-                    animation_data["frames_white_flipped"] = []
-
-            # Load each frame for animation
-            for _ in range(frame_length):
-                # Create new transparent surface of correct size
-                rect = pygame.Rect((x, y, x_size, y_size))
-                image = pygame.Surface(rect.size, pygame.SRCALPHA).convert_alpha()
-
-                # Crop spritesheet onto image and scale
-                image.blit(self.spritesheet_image, (0, 0), rect)
-                image = pygame.transform.scale(image, (int(x_size*scale[0]), int(y_size*scale[1])))
-
-                # Save image as frame and advance x, y offset in spritesheet
-                x += x_offset
-                y += y_offset
-                animation_data["frames"].append(image)
-                # Create other types of frames
-                if calculate_flip:
-                    # Flip about vertical axis
-                    animation_data["frames_flipped"].append(pygame.transform.flip(image, True, False))
-                if calculate_white:
-                    white_image = image.copy()
-                    w, h = white_image.get_size()
-                    # Set all non transparent pixels within image to white
-                    for x_px in range(w):
-                        for y_px in range(h):
-                            if white_image.get_at((x_px, y_px)).a == 255:
-                                white_image.set_at((x_px, y_px), pygame.Color(255,255,255))
-                    # Add white frame and calculate flipped white
-                    animation_data["frames_white"].append(white_image)
-                    if calculate_flip:
-                        # Flip about vertical axis
-                        animation_data["frames_white_flipped"].append(pygame.transform.flip(white_image, True, False))
-            
-            # Add animation
-            self.animations_data.append(animation_data)
+        self.clips = load_animation_clips(spritesheet_json_filename, scale, calculate_flip, calculate_white)
+        self.animations_data = self.clips.animations
 
     def play_animation(self, animation_name="", speed=1, animation_time=0, loop=False, on_animation_end = lambda self: 1, on_animation_interrupt = lambda self: 1):
         """ Start playing animation when rendering.
@@ -346,12 +572,35 @@ class AnimatedSprite():
         if flag and Settings.DEBUG:
             print(f"Animation {animation_name} not found")
 
+    def reset_state(self, base):
+        """ Resets sprite in place to match base, as a fresh copy of base would be, so pooled sprites can be reused.
+        Animation clips are shared with base rather than copied.
+
+        Args:
+            base (AnimatedSprite): Sprite of the same type to reset state from (required).
+        """
+        current = self.__dict__
+        self.__dict__ = {}
+        for name, attr in base.__dict__.items():
+            if name in self.SHARED_ATTRIBUTES:
+                self.__dict__[name] = attr
+            elif isinstance(attr, AnimatedSprite) and isinstance(current.get(name), AnimatedSprite):
+                # Reset child sprites in place too
+                current[name].reset_state(attr)
+                self.__dict__[name] = current[name]
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+                self.__dict__[name] = attr.copy()
+            else:
+                self.__dict__[name] = copy.deepcopy(attr)
+
     # https://stackoverflow.com/questions/57225611/how-to-deepcopy-object-which-contains-pygame-surface
     def copy(self):
         """ Standard copy constructor for complex objects """
         copyobj = AnimatedSprite()
         for name, attr in self.__dict__.items():
-            if hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
+            if name in self.SHARED_ATTRIBUTES:
+                copyobj.__dict__[name] = attr
+            elif hasattr(attr, 'copy') and callable(getattr(attr, 'copy')):
                 copyobj.__dict__[name] = attr.copy()
             else:
                 copyobj.__dict__[name] = copy.deepcopy(attr)
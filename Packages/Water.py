@@ -35,7 +35,7 @@ class Water():
         if not water_rect == None:
             self.tile_from_rect(water_rect)
     
-    def tile_from_rect(self, rect, grass_density=3/4, bubble_density=1/6, bubbly_density=1/8, bubbliest_density=1/16):
+    def tile_from_rect(self, rect, grass_density=3/4, bubble_density=1/6, bubbly_density=1/8, bubbliest_density=1/16, rng=random):
         """
 
             rect (pygame.Rect): 
@@ -43,6 +43,7 @@ class Water():
             bubble_density (float): Fraction of tiles which are slightly bubbly.
             bubbly_density (float): Fraction of tiles which are bubbly.
             bubbliest_density (float): Fraction of tiles which are very bubbly.
+            rng (random.Random): Random number generator tiles are chosen with, defaults to global generator.
 
         """
         # Add row so their is no gap at end
@@ -62,38 +63,38 @@ class Water():
             self.waterbase.render(self.image_infront, "base", offset)
 
             # Add grass randomly infront of base
-            if random.uniform(0,1) <= grass_density:
+            if rng.uniform(0,1) <= grass_density:
                 self.waterbase.render(self.image_infront, "grass", offset)
 
             # Render foam behind player
             self.waterbase.render(self.image_behind, "foam", offset)
 
             # Append animated sprites to list
-            if random.uniform(0,1) <= bubbliest_density:
+            if rng.uniform(0,1) <= bubbliest_density:
                 new_tile = self.water_bubbliest.copy()
                 # Set position correctly
                 new_tile.position = self.position + offset
                 new_tile.play_animation("loop", loop=True)
 
                 # Offset animation times of tiles
-                new_tile.animation_time = random.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
+                new_tile.animation_time = rng.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
 
                 self.animated_sprite_tiles.append(new_tile)
-            elif random.uniform(0,1) <= bubbly_density:
+            elif rng.uniform(0,1) <= bubbly_density:
                 new_tile = self.water_bubbly.copy()
                 new_tile.position = self.position + offset
                 new_tile.play_animation("loop", loop=True)
-                new_tile.animation_time = random.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
+                new_tile.animation_time = rng.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
                 self.animated_sprite_tiles.append(new_tile)
-            elif random.uniform(0,1) <= bubble_density:
+            elif rng.uniform(0,1) <= bubble_density:
                 new_tile = self.water.copy()
                 new_tile.position = self.position + offset
                 new_tile.play_animation("loop", loop=True)
-                new_tile.animation_time = random.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
+                new_tile.animation_time = rng.uniform(0, new_tile.animations_data[new_tile.animation_index]["time"])
                 self.animated_sprite_tiles.append(new_tile)
         # Apply transparency to infront images
         self.image_infront.convert_alpha()
-    def render_infront(self, delta, surface, offset=pygame.Vector2(0,0)):
+    def render_infront(self, delta, surface, offset=pygame.Vector2(0,0), view=None):
         """ Draw parts of water which lie infront of entities
         Returns list of dirty rects which have been rendered to.
 
@@ -101,17 +102,20 @@ class Water():
             delta (float): Seconds since last render infront call, used to update animations (required). 
             surface (pygame.Surface): Surface to render to (required).
             offset (pygame.Vector2): Offset between position of water and render position.
+            view (pygame.Rect): Visible rectangle of surface, which static images are cropped to.
         """
-        # Draw static images
-        surface.blit(self.image_infront, self.position + offset)
+        if view == None:
+            view = surface.get_rect()
+        # Draw visible part of static images
+        dirty_rects = Sprite.blit_visible(surface, self.image_infront, self.position + offset, view)
 
         # Draw and update each of the animated tiles
         for tile in self.animated_sprite_tiles:
             tile.render(surface, offset, delta=delta)
 
         # Since all relevant animations lie within static image, just return its rect
-        return [self.image_infront.get_rect()]
-    def render_behind(self, delta, surface, offset=pygame.Vector2(0,0)):
+        return dirty_rects
+    def render_behind(self, delta, surface, offset=pygame.Vector2(0,0), view=None):
         """ Draw parts of water which lie behind of entities
         Returns list of dirty rects which have been rendered to.
 
@@ -119,8 +123,11 @@ class Water():
             delta (float): Unused argument for consistency, eg. 0. 
             surface (pygame.Surface): Surface to render to (required).
             offset (pygame.Vector2): Offset between position of water and render position.
+            view (pygame.Rect): Visible rectangle of surface, which static images are cropped to.
         """
-        return [surface.blit(self.image_behind, self.position + offset)]
+        if view == None:
+            view = surface.get_rect()
+        return Sprite.blit_visible(surface, self.image_behind, self.position + offset, view)
     
     # https://stackoverflow.com/questions/57225611/how-to-deepcopy-object-which-contains-pygame-surface
     def copy(self):
@@ -0,0 +1,171 @@
+# Headless benchmark which plays every level with scripted input and reports frame timings as json
+# Usage: python benchmark.py [--frames 600] [--levels Tutorial1 Factory2] [--script script.json] [--output results.json]
+import os, sys, json, time, argparse, tracemalloc
+
+# Run without a window or audio device, must be set before pygame initializes
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame
+
+try:
+    # Peak resident memory isn't available on windows
+    import resource
+except ImportError:
+    resource = None
+
+from Packages import Settings, Profiler
+Settings.init(null_audio=True)
+# Importing main constructs level and base entities using the initialized settings
+import main
+
+# Default input script, actions are looked up in user bindings and the script repeats every length frames
+DEFAULT_SCRIPT = {
+    "length": 240,
+    "inputs": [
+        {"frame": 0, "action": "right", "pressed": True},
+        {"frame": 30, "action": "jump", "pressed": True},
+        {"frame": 45, "action": "jump", "pressed": False},
+        {"frame": 60, "action": "attack", "pressed": True},
+        {"frame": 62, "action": "attack", "pressed": False},
+        {"frame": 120, "action": "right", "pressed": False},
+        {"frame": 120, "action": "left", "pressed": True},
+        {"frame": 150, "action": "jump", "pressed": True},
+        {"frame": 170, "action": "jump", "pressed": False},
+        {"frame": 200, "action": "attack", "pressed": True},
+        {"frame": 202, "action": "attack", "pressed": False},
+        {"frame": 239, "action": "left", "pressed": False},
+    ]
+}
+
+class ScriptedInput():
+    """ Produces key events from an input script each time it is called, in place of pygame.event.get.
+
+    Args:
+        script (dict): Script with length in frames and list of inputs with frame, action and pressed (required).
+    """
+    def __init__(self, script):
+        self.length = script["length"]
+        self.frame = 0
+
+        # Group key events by frame within script
+        self.events = {}
+        for scripted in script["inputs"]:
+            key = pygame.key.key_code(Settings.USER_SETTINGS["bindings"][scripted["action"]])
+            event = pygame.event.Event(pygame.KEYDOWN if scripted["pressed"] else pygame.KEYUP, key=key, mod=0, unicode="", scancode=0)
+            self.events.setdefault(scripted["frame"] % self.length, []).append(event)
+
+    def __call__(self):
+        # Still drain real events so the dummy driver's queue doesn't fill
+        events = pygame.event.get() + self.events.get(self.frame % self.length, [])
+        self.frame += 1
+        return events
+
+def percentile(values, fraction):
+    """ Gets value at fraction of sorted values using nearest rank.
+
+    Args:
+        values ([float]): Values to take percentile of (required).
+        fraction (float): Fraction between 0 and 1 eg. 0.99 (required).
+    """
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered)-1, int(len(ordered)*fraction + 0.5) - 1))]
+
+def get_levels():
+    """ Gets name of every level directory containing a level.json """
+    directory = Settings.SRC_DIRECTORY + "Levels/"
+    return sorted(name for name in os.listdir(directory) if not name.startswith(".") and os.path.exists(directory + name + "/level.json"))
+
+def benchmark_level(level_name, frames, script):
+    """ Loads level and plays it through the real gameloop for a number of frames.
+    Returns dict of timings and memory usage.
+
+    Args:
+        level_name (str): Name of level directory to benchmark (required).
+        frames (int): Number of frames to run (required).
+        script (dict): Input script which drives player (required).
+    """
+    level = main.level
+
+    # Start cold so load time doesn't depend on which levels were benchmarked or prefetched before
+    Settings.level_cache.clear()
+    level.prefetcher.clear(wait=True)
+
+    # Trace python allocations only while loading since tracing slows every frame
+    tracemalloc.start()
+    start = time.perf_counter()
+    # Start from a fresh save which respawns in this level
+    level.load_fresh(level_name)
+    load_time = time.perf_counter() - start
+    peak_load_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Loading again is served from level cache, as when returning to a level
+    start = time.perf_counter()
+    level.load_fresh(level_name)
+    warm_load_time = time.perf_counter() - start
+
+    # Profiler history holds every benchmarked frame
+    Settings.profiler = Profiler.Profiler(history=frames)
+    main.gameloop(get_events=ScriptedInput(script), max_frames=frames, is_title=False)
+
+    frame_times = [sum(frame.values())*1000 for frame in Settings.profiler.frames]
+    result = {
+        "level": level_name,
+        "end_level": level.level_name,
+        "frames": len(frame_times),
+        "load_time_ms": load_time*1000,
+        "warm_load_time_ms": warm_load_time*1000,
+        "frame_time_ms": {
+            "mean": sum(frame_times)/len(frame_times),
+            "p50": percentile(frame_times, 0.5),
+            "p95": percentile(frame_times, 0.95),
+            "p99": percentile(frame_times, 0.99),
+            "max": max(frame_times),
+        },
+        "stages_ms": {stage: {"mean": average, "p99": p99} for stage, (average, p99) in Settings.profiler.get_stats().items()},
+        # Python allocations only, pygame surfaces are allocated outside of python's allocator
+        "peak_load_python_memory_kb": peak_load_memory / 1024,
+        "peak_rss_kb": None,
+    }
+    if not resource == None:
+        # Process wide peak so never decreases between levels, reported in bytes on macos
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak_rss_kb"] = peak_rss / 1024 if sys.platform == "darwin" else peak_rss
+    return result
+
+def run():
+    parser = argparse.ArgumentParser(description="Headless benchmark of every level using scripted input")
+    parser.add_argument("--frames", type=int, default=600, help="frames to run per level")
+    parser.add_argument("--levels", nargs="*", default=None, help="level names, defaults to every level")
+    parser.add_argument("--script", default=None, help="json input script, defaults to built in script")
+    parser.add_argument("--output", default=None, help="file to write json results to, defaults to stdout")
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if not args.script == None:
+        with open(args.script) as json_file:
+            script = json.load(json_file)
+
+    # Repeatable timings, run uncapped with every frame simulating the same time
+    Settings.FPS_CAP = 0
+    Settings.FIXED_FRAME_DELTA = Settings.PHYSICS_STEP
+
+    results = {
+        "frames_per_level": args.frames,
+        "resolution": Settings.RESOLUTION,
+        "levels": [benchmark_level(level_name, args.frames, script) for level_name in (args.levels or get_levels())],
+    }
+
+    output = json.dumps(results, indent=4)
+    if args.output == None:
+        print(output)
+    else:
+        with open(args.output, "w") as file:
+            file.write(output)
+
+    Settings.presenter.close()
+    pygame.quit()
+
+if __name__ == "__main__":
+    run()
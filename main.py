@@ -3,6 +3,7 @@ import platform
 import copy
 import pickle
 import os
+import argparse
 # Suppress help message
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import warnings
@@ -12,15 +13,16 @@ import pygame_gui
 import pygame
 
 # Import packages
-from Packages import Settings, Level, Player, Gui, Enemy, Water, Console
+from Packages import Settings, Level, Player, Gui, Enemy, Water, Console, Replay, Profiler, LevelAssets, Collision, BatchPhysics
 
 # Used for window management and movement
 if platform.system() == "Windows":
     import ctypes
 
 # Initialize Settings, level and debug objects in global scope
-# Loads audio and display into Setting scope
-Settings.init()
+# Loads audio and display into Setting scope, unless already initialized by an importing script eg. benchmark
+if not Settings.initialized:
+    Settings.init()
 
 # Initialize level with base objects which are copied into level
 level = Level.Level(
@@ -121,35 +123,71 @@ level = Level.Level(
     ),
 )
 debug_console = Console.Console(Settings.true_surface, level)
+# Every startup asset has been taken, so free anything preloaded but unused
+Settings.preloader.close()
 
 
-def gameloop():
+def gameloop(get_events=pygame.event.get, max_frames=None, is_title=True, replay=None):
+    """ Runs game until quit or display needs restarting.
+    Returns 1 if display should be restarted, 0 otherwise.
+
+    Args:
+        get_events (function): Called each frame to get list of events to process.
+        max_frames (int): Number of frames to run before returning, runs until quit if None.
+        is_title (bool): Flag to start in title screen, otherwise starts playing currently loaded level.
+        replay (Replay.Recorder): Recorder or Replayer which supplies events and frame times instead of get_events and clock.
+    """
+    if not replay == None:
+        get_events = replay.get_events
+
     # Setup game states
-    is_running, is_paused, is_title, is_end_game = (True, False, True, False)
+    is_running, is_paused, is_end_game = (True, False, False)
 
     # Set gui state to intially be the title screen
     if is_title:
         Settings.gui.set_state("title")
         Settings.MUSIC["title"].Play(loops=-1)
+    else:
+        Settings.gui.set_state()
 
     # Setup counters for multiframe states, fade into menu
     damage_freeze = 0
     transition_frames = 0
     untransition_frames = Settings.TRANSITION_MAX_FRAMES
+    # Next level is prepared a slice at a time while fading out, then swapped in once fully black
+    level_loader, prepared_level = None, None
+    # Enemies are moved together once there are many of them, if numpy is installed
+    enemy_batch = BatchPhysics.EnemyBatch()
+    use_enemy_batch = Settings.BATCH_ENEMY_PHYSICS and enemy_batch.is_available()
+
+    # Setup fixed timestep accumulator and events waiting for a physics step
+    accumulator = 0
+    pending_events = []
 
     # Core render and event post test loop
+    frame = 0
     while is_running:
-        # Set frame rate to 60fps
-        dt = Settings.clock.tick(60) / 1000  # Seconds elapsed
+        if not max_frames == None and frame >= max_frames:
+            return 0
+        frame += 1
+
+        # Limit frame rate, physics runs at fixed rate independent of this
+        dt = Settings.clock.tick(Settings.FPS_CAP) / 1000  # Seconds elapsed
+        if not Settings.FIXED_FRAME_DELTA == None:
+            dt = Settings.FIXED_FRAME_DELTA
+        # Time spent waiting on clock isn't part of frame
+        Settings.profiler.begin_frame()
 
         # Handle events
-        events = pygame.event.get()
+        events = get_events()
         for event in events:
             # Global events
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_TAB:
                     Settings.DEBUG = not Settings.DEBUG
                     print("Debug mode", ["off", "on"][Settings.DEBUG])
+                elif event.key == pygame.K_F3 and Settings.DEBUG:
+                    print("Frame timings written to", debug_console.dump_profile())
             elif event.type == pygame.KEYUP:
                 if event.key == pygame.K_BACKQUOTE:
                     debug_console.console.toggle()
@@ -160,13 +198,17 @@ def gameloop():
                 return
             # Handle window resize
             if event.type == pygame.VIDEORESIZE:
-                # Resize stale display to new size
+                # Resize stale display to new size once any frame in flight is presented
+                Settings.presenter.wait()
                 old_surface_saved = Settings.true_surface
                 Settings.true_surface = pygame.display.set_mode(
                     (event.w, event.h), pygame.RESIZABLE)
                 Settings.true_surface.blit(old_surface_saved, (0, 0))
                 del old_surface_saved
 
+                # Resize scaling buffers to new display
+                Settings.presenter.rebuild(Settings.true_surface, Settings.surface)
+
                 # Scale gui mouse position
                 Settings.gui_manager.mouse_pos_scale_factor = (
                     Settings.RESOLUTION[0] / event.w, Settings.RESOLUTION[1] / event.h)
@@ -186,9 +228,12 @@ def gameloop():
         # Process dialog boxes events and determine state
         is_dialog = False
         if untransition_frames == 0:
+            # Only dialogs player is near enough to warm or trigger, or which are already active, need updating
+            nearby_dialogs = [collider.item for collider in level.collision_world.query(level.player.collider.inflate(Settings.DIALOG_WARM_DISTANCE*2, Settings.DIALOG_WARM_DISTANCE*2), Collision.DIALOG)]
             for dialog in level.dialog_boxes:
-                is_dialog = is_dialog or dialog.update(
-                    level, level.player.collider, level.name)
+                if dialog in nearby_dialogs or dialog.dialog_group:
+                    is_dialog = is_dialog or dialog.update(
+                        level, level.player.collider, level.name)
                 dialog.process_events(events, level.name)
 
         # Pause when console is open
@@ -203,6 +248,7 @@ def gameloop():
             transition_frames = Settings.TRANSITION_MAX_FRAMES
             Settings.SELECTED_SAVE = save
             level.load_save(save_num=Settings.SELECTED_SAVE)
+            accumulator, pending_events = 0, []
             if not name is None:
                 level.name = name
             Settings.MUSIC["ambient"].Play(loops=-1, fade_in_ms=2000)
@@ -223,144 +269,221 @@ def gameloop():
             dt = 0
         Settings.window_rect = new_window_rect
 
+        # Frame time is final here so it can be recorded or replaced by recorded time
+        if not replay == None:
+            dt = replay.frame_delta(dt)
+
+        Settings.profiler.mark("events")
+
         # Handle game objects if not in title
         if not is_title:
-            # Handle physics and animations if unpaused
-            if not is_paused and damage_freeze == 0 and not is_end_game:
-                physical_colliders = level.get_colliders()
-                attack_colliders = level.player.get_attack_colliders()
-
-                # Setup list for enemy damage colliders
-                damage_colliders = []
-
-                # Traverse enemies using polymorphism (sort of)
-                hit_occured = False
-                for enemy in level.enemies[:]:
-                    if enemy.state == "dead":
-                        level.enemies.remove(enemy)
-                    else:
-                        enemy.update_state(pygame.Vector2(level.player.collider.center))
-
-                        # Calculates physics and ai, determines whether player has been hit
-                        if enemy.physics_process(1/60, physical_colliders, pygame.Vector2(level.player.collider.center), attack_colliders):
-                            damage_freeze = 3
-                            hit_occured = True
-
-                        damage_colliders += enemy.get_damage_colliders()
-
-                # Use getter functions so level can edit colliders with state
-                state_changes = level.player.physics_process(1/60, physical_colliders, damage_colliders, level.get_hitable_colliders(
-                ), level.get_death_colliders(), level.get_save_colliders(), level.get_water_colliders(), level.transitions, hit_occured, not is_dialog)
-
-                # Proccess player state_changes
-
-                # Handle spawning, either loading in or 0 lives
-                if state_changes["respawn"]:
-                    def end_animation(self):
-                        level.load_level(level_name=level.save_level)
-                        level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
-                        level.player.play_animation("unsit", speed=0.5)
-                    level.player.play_animation(
-                        "death", on_animation_end=end_animation)
-                # Handle deaths from environment by resetting
-                elif state_changes["reset"]:
-                    level.player.play_animation(
-                        "death", on_animation_end=lambda x: level.reset_level())
-                # Fade screen when transitioning
-                elif not state_changes["transition"] == None:
-                    transition_frames = Settings.TRANSITION_MAX_FRAMES
-                # Add freeze effect when hit
-                elif state_changes["hit"]:
-                    damage_freeze = 8
-
-                # Calculate player actions if not in dialog
-                if not is_dialog:
-                    should_save = level.player.input(events)
-                    if should_save:
-                        Settings.gui.save_animation.play_animation("base")
-                        level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
-                        level.save_level = level.level_name
-                        level.save_dialog_completion = copy.deepcopy(
-                            level.dialog_completion)
-                        level.save_game()
-                        Settings.SOUND_EFFECTS["save"].Play()
-                else:
-                    # Allows player to hold keys before ending dialog
-                    level.player.input_static(events)
-
-                # Handle events for collectables
-                for collectable in level.collectables[:]:
-                    if collectable.state == "death":
-                        # Slow and flash screen while collecting
-                        damage_freeze = 6
-                        level.player.is_white = True
-                        Settings.SOUND_EFFECTS["collectable"].Play(fade_in_ms=100,loops=-1)
-                    if collectable.physics_process(1/60, level.player.collider):
-                        level.collectables.remove(collectable)
-                        # Save that player has collected
-                        level.challenges.append(level.level_name)
-                        level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
-                        Settings.SOUND_EFFECTS["collectable"].Stop(fade_out_ms=50)
-
-                # Track camera to player if in leaving transition
-                if level.player.transition == None:
-                    Settings.camera.update_position(pygame.Vector2(level.player.collider.center[0], level.player.collider.center[1] - level.player.collider.size[1]), Settings.surface)
-
-                # Set rendering dt
-                _dt = dt
+            # Queue events so inputs aren't lost on frames where no physics step is run
+            pending_events += events
+
+            if is_paused or is_end_game:
+                # Allows player to hold inputs during pause
+                level.player.input_static(pending_events)
+                pending_events = []
+                # Time isn't accumulated while paused so unpausing doesn't cause a burst of steps
             else:
-                # Allows player to hold inputs during pause/damage freeze
-                level.player.input_static(events)
+                # Clamp frame time so a long stall can't cause a spiral of death
+                accumulator += min(dt, Settings.MAX_FRAME_TIME)
 
-                # Don't animate entities
-                _dt = 0
-                if damage_freeze > 0:
+            # Advance physics and animations in fixed steps, running as many as fit in elapsed time
+            steps, simulated_time = 0, 0
+            while accumulator >= Settings.PHYSICS_STEP and steps < Settings.MAX_PHYSICS_STEPS:
+                accumulator -= Settings.PHYSICS_STEP
+                steps += 1
+
+                # Only first step of a frame receives the queued events
+                step_events, pending_events = pending_events, []
+
+                # Save positions before step so rendering can interpolate between steps, frozen steps leave everything in place
+                Settings.camera.save_physics_state()
+                level.player.save_physics_state()
+                for enemy in level.enemies:
+                    enemy.save_physics_state()
+                for collectable in level.collectables:
+                    collectable.save_physics_state()
+
+                if damage_freeze == 0:
+                    Settings.profiler.mark("physics")
+
+                    attack_colliders = level.player.get_attack_colliders()
+
+                    # Traverse enemies using polymorphism (sort of)
+                    for enemy in level.enemies[:]:
+                        if enemy.state == "dead":
+                            level.enemies.remove(enemy)
+                            level.collision_world.remove(enemy)
+                        else:
+                            enemy.update_state(pygame.Vector2(level.player.collider.center))
+
+                    # Calculates physics and ai, determines whether player has been hit
+                    hit_occured = False
+                    if use_enemy_batch and len(level.enemies) >= Settings.BATCH_ENEMY_PHYSICS_MIN:
+                        # Move every enemy at once
+                        hit_occured = enemy_batch.physics_process(level.enemies, Settings.PHYSICS_STEP, level.collision_world, pygame.Vector2(level.player.collider.center), attack_colliders)
+                    else:
+                        for enemy in level.enemies:
+                            if enemy.physics_process(Settings.PHYSICS_STEP, level.collision_world, pygame.Vector2(level.player.collider.center), attack_colliders):
+                                hit_occured = True
+                    if hit_occured:
+                        damage_freeze = 3
+                    Settings.profiler.mark("enemies")
+
+                    # Enemies update their own colliders in collision world, so player sees their damage colliders
+                    state_changes = level.player.physics_process(Settings.PHYSICS_STEP, level.collision_world, hit_occured, not is_dialog)
+                    Settings.profiler.mark("player")
+
+                    # Proccess player state_changes
+
+                    # Handle spawning, either loading in or 0 lives
+                    if state_changes["respawn"]:
+                        def end_animation(self):
+                            level.load_level(level_name=level.save_level)
+                            level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
+                            level.player.play_animation("unsit", speed=0.5)
+                        level.player.play_animation(
+                            "death", on_animation_end=end_animation)
+                    # Handle deaths from environment by resetting
+                    elif state_changes["reset"]:
+                        level.player.play_animation(
+                            "death", on_animation_end=lambda x: level.reset_level())
+                    # Fade screen when transitioning
+                    elif not state_changes["transition"] == None:
+                        transition_frames = Settings.TRANSITION_MAX_FRAMES
+                        level_loader = level.prepare_level(level.player.transition["to_level"])
+                        prepared_level = None
+                    # Add freeze effect when hit
+                    elif state_changes["hit"]:
+                        damage_freeze = 8
+
+                    # Calculate player actions if not in dialog
+                    if not is_dialog:
+                        should_save = level.player.input(step_events)
+                        if should_save:
+                            Settings.gui.save_animation.play_animation("base")
+                            level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
+                            level.save_level = level.level_name
+                            level.save_dialog_completion = copy.deepcopy(
+                                level.dialog_completion)
+                            level.save_game()
+                            Settings.SOUND_EFFECTS["save"].Play()
+                    else:
+                        # Allows player to hold keys before ending dialog
+                        level.player.input_static(step_events)
+
+                    # Handle events for collectables
+                    for collectable in level.collectables[:]:
+                        if collectable.state == "death":
+                            # Slow and flash screen while collecting
+                            damage_freeze = 6
+                            level.player.is_white = True
+                            Settings.SOUND_EFFECTS["collectable"].Play(fade_in_ms=100,loops=-1)
+                        if collectable.physics_process(Settings.PHYSICS_STEP, level.player.collider):
+                            level.collectables.remove(collectable)
+                            # Save that player has collected
+                            level.challenges.append(level.level_name)
+                            level.player.hearts = Settings.PLAYER_HEARTS + len(level.challenges)
+                            Settings.SOUND_EFFECTS["collectable"].Stop(fade_out_ms=50)
+
+                    # Track camera to player if in leaving transition
+                    if level.player.transition == None:
+                        Settings.camera.update_position(pygame.Vector2(level.player.collider.center[0], level.player.collider.center[1] - level.player.collider.size[1]), Settings.surface)
+
+                    # Animations advance by simulated time rather than frame time
+                    simulated_time += Settings.PHYSICS_STEP
+                else:
+                    # Allows player to hold inputs during damage freeze
+                    level.player.input_static(step_events)
                     damage_freeze -= 1
 
-            # Render game
+            # Drop time which couldn't be simulated within step limit, keeping fraction for interpolation
+            if accumulator >= Settings.PHYSICS_STEP:
+                accumulator %= Settings.PHYSICS_STEP
+
+            # Set rendering dt, don't animate entities if no time was simulated
+            _dt = simulated_time
+
+            # Interpolate rendering between previous and current physics step
+            alpha = accumulator / Settings.PHYSICS_STEP
+            camera_position = Settings.camera.get_interpolated_position(alpha)
+            level.player.interpolate(alpha)
+            for enemy in level.enemies:
+                enemy.interpolate(alpha)
+            for collectable in level.collectables:
+                collectable.interpolate(alpha)
+
+            Settings.profiler.mark("physics")
+
+            # Static level rendering only changes when camera moves
+            Settings.presenter.track_camera(camera_position)
+
+            # Render game, collecting rects which changed since static level rendering
+            dirty_rects = []
             Settings.surface.fill((0, 0, 0))
             level.render_behind(_dt, Settings.surface,
-                                Settings.camera.position)
+                                camera_position)
+            Settings.profiler.mark("render_behind")
 
             # Don't render player in EndGame
             if not is_end_game:
                 # Entities
-                level.player.render(
-                    Settings.surface, Settings.camera.position, delta=_dt)
+                dirty_rects += level.player.render(
+                    Settings.surface, camera_position, delta=_dt)
                 for enemy in level.enemies:
-                    enemy.render(Settings.surface,
-                                 Settings.camera.position, delta=_dt)
+                    dirty_rects += enemy.render(Settings.surface,
+                                 camera_position, delta=_dt)
                 for collectable in level.collectables:
-                    collectable.render(Settings.surface,
-                                       Settings.camera.position, delta=_dt)
+                    dirty_rects += collectable.render(Settings.surface,
+                                       camera_position, delta=_dt)
+
+            Settings.profiler.mark("entities")
 
             # Render frontground before gui
-            level.render_infront(dt, Settings.surface,
-                                 Settings.camera.position)
+            dirty_rects += level.render_infront(dt, Settings.surface,
+                                 camera_position)
+            Settings.profiler.mark("render_infront")
 
             # Debug rendering for colliders
             if Settings.DEBUG:
-                level.render_colliders(Settings.surface, Settings.camera.position)
-                level.player.render_colliders(Settings.surface, Settings.camera.position)
+                level.render_colliders(Settings.surface, camera_position)
+                dirty_rects += level.player.render_colliders(Settings.surface, camera_position)
                 for enemy in level.enemies:
-                    enemy.render_colliders(Settings.surface, Settings.camera.position)
+                    dirty_rects += enemy.render_colliders(Settings.surface, camera_position)
                 for collectable in level.collectables:
-                    collectable.render_colliders(Settings.surface, Settings.camera.position)
+                    dirty_rects += collectable.render_colliders(Settings.surface, camera_position)
 
             # Don't render health in EndGame
             if not is_end_game:
                 # Ingame Gui rendering beneath gui
-                Settings.gui.render_ingame(
-                    dt, Settings.surface, level.player, len(level.challenges), Settings.camera.position)
+                dirty_rects += Settings.gui.render_ingame(
+                    dt, Settings.surface, level.player, len(level.challenges), camera_position)
 
             # Handle fade to black during transitions
             if transition_frames > 0:
-                transition_frames -= 1
-                alpha = 255 - (transition_frames /
-                               Settings.TRANSITION_MAX_FRAMES)*255
+                # Prepare next level within a time budget each frame of the fade
+                if not level_loader == None:
+                    prepared_level = LevelAssets.advance(level_loader, Settings.LEVEL_LOAD_FRAME_BUDGET)
+                    if not prepared_level == None:
+                        level_loader = None
+                # Hold on black until prepared, except when replaying since replays must take the same frames
+                if transition_frames == 1 and not level_loader == None and not replay == None:
+                    prepared_level = LevelAssets.advance(level_loader)
+                    level_loader = None
+                is_holding = transition_frames == 1 and not level_loader == None
+                if is_holding:
+                    # Level can't be swapped in yet, so stay fully black
+                    alpha = 255
+                else:
+                    transition_frames -= 1
+                    alpha = 255 - (transition_frames /
+                                   Settings.TRANSITION_MAX_FRAMES)*255
                 
                 # Overlay increasingly black alpha mask to fade to black
                 Settings.surface.fill((0, 0, 0, alpha))
+                Settings.presenter.invalidate()
                 if transition_frames == 0:
                     # When transitioned fully load next level
                     if not level.player.transition == None:
@@ -368,7 +491,7 @@ def gameloop():
                             # Handle special case of EndGame
                             is_end_game = True
                             level.load_level(
-                                level_name=level.player.transition["to_level"], transition=level.player.transition)
+                                level_name=level.player.transition["to_level"], transition=level.player.transition, prepared=prepared_level)
 
                             # Update end_game gui to show how many challenges were completed
                             Settings.gui.set_state("end_game")
@@ -387,7 +510,8 @@ def gameloop():
                             Settings.MUSIC["ambient"].Stop()
                         else:
                             level.load_level(
-                                level_name=level.player.transition["to_level"], transition=level.player.transition)
+                                level_name=level.player.transition["to_level"], transition=level.player.transition, prepared=prepared_level)
+                        prepared_level = None
                         
                         # Load setup fade to white
                         untransition_frames = Settings.TRANSITION_MAX_FRAMES
@@ -398,105 +522,183 @@ def gameloop():
                             Settings.TRANSITION_MAX_FRAMES)*255
                 Settings.surface.fill(
                     (0, 0, 0, alpha), special_flags=pygame.BLEND_RGBA_SUB)
+                Settings.presenter.invalidate()
+
+            Settings.profiler.mark("gui")
 
             # Scale game rendering to camera
-            Settings.true_surface.blit(pygame.transform.scale(Settings.surface, (int(Settings.true_surface.get_rect().size[0]*Settings.camera.scale[0]), int(Settings.true_surface.get_rect().size[1]*Settings.camera.scale[1]))),
-                                       (0, 0)
-                                       )
+            Settings.presenter.present_world(Settings.camera.scale)
+            Settings.presenter.add_world_rects(dirty_rects, Settings.camera.scale)
+            Settings.profiler.mark("scaling")
             # Use transparency so next rendering pass doesnt overwrite previous
             Settings.surface.fill((0, 0, 0, 0))
 
             # Don't scale dialog boxes
             if untransition_frames == 0:
                 for dialogue_box in level.dialog_boxes:
-                    dialogue_box.render(Settings.surface)
+                    Settings.presenter.add_gui_rects(dialogue_box.render(Settings.surface))
 
         # Render pygame_gui ui
-        Settings.gui.render(Settings.surface, dt)
+        Settings.presenter.add_gui_rects(Settings.gui.render(Settings.surface, dt))
         Settings.gui_manager.draw_ui(Settings.surface)
+        Settings.presenter.add_gui_rects(Settings.gui.get_element_rects())
+
+        # Graph frame timings over gui
+        if Settings.DEBUG:
+            Settings.presenter.add_gui_rects(Settings.profiler.render(Settings.surface, (4, 4), frame_budget=Settings.PHYSICS_STEP))
+        Settings.profiler.mark("gui")
 
         # Scale gui rendering to resized resolution
-        Settings.true_surface.blit(pygame.transform.scale(
-            Settings.surface, Settings.true_surface.get_rect().size), (0, 0))
-        debug_console.console.show(Settings.true_surface)
+        Settings.presenter.present_gui()
+        Settings.profiler.mark("scaling")
+
+        # Console is drawn straight to display so can't be tracked with dirty rects
+        if debug_console.console.enabled:
+            Settings.presenter.invalidate()
         
-        # Refresh entire screen
-        pygame.display.update()
+        # Refresh screen, only where rendering changed if using dirty rects, drawing console over frame
+        Settings.presenter.update_display([debug_console.console.show] if debug_console.console.enabled else [])
+        Settings.profiler.mark("display")
+
+        # Finish prefetched neighbouring levels a little each frame
+        level.prefetcher.update(Settings.PREFETCH_FRAME_BUDGET)
+        Settings.profiler.mark("prefetch")
+        Settings.profiler.end_frame()
+
+        if not replay == None:
+            replay.end_frame(level)
     # Exit game if is_running is false
     return 0
 
-# Keep refreshing display until game is quit
-while gameloop() == 1:
-    if Settings.DEBUG:
-        print("Reset display and recalculated gui")
-
-    # Calculate new resolution and display info
-    Settings.RESOLUTION_STR = Settings.USER_SETTINGS["resolution"]
-    Settings.RESOLUTION = (int(Settings.RESOLUTION_STR.split(
-        'x')[0]), int(Settings.RESOLUTION_STR.split('x')[1]))
-
-    info = pygame.display.Info()
-    screen_width, screen_height = info.current_w, info.current_h
-    if platform.system() == "Windows":
-        # After the display has already been intialized display.info doesn't
-        # return the correct correct screen size on windows. Use windll to get 
-        # the correct resolution
-        # https://gamedev.stackexchange.com/questions/105750/pygame-fullsreen-display-issue
-        ctypes.windll.user32.SetProcessDPIAware()
-        true_res = (ctypes.windll.user32.GetSystemMetrics(0),
-                    ctypes.windll.user32.GetSystemMetrics(1))
-        screen_width, screen_height = true_res
-    Settings.is_fullscreen = Settings.USER_SETTINGS["fullscreen"]
-    if Settings.USER_SETTINGS["fullscreen"]:
-        Settings.true_surface = pygame.display.set_mode(
-            (screen_width, screen_height), flags=pygame.FULLSCREEN)
+
+def run_replay(filename, profile_filename=None):
+    """ Replays recording as fast as possible and reports whether simulation matched recording.
+
+    Args:
+        filename (str): Path of replay file (required).
+        profile_filename (str): Path to write per frame stage timings to as csv.
+    """
+    replay = Replay.Replayer(filename)
+    Settings.profiler = Profiler.Profiler(history=replay.get_frame_count())
+    Settings.FPS_CAP = 0
+
+    replay.start(level)
+    gameloop(max_frames=replay.get_frame_count(), is_title=False, replay=replay)
+
+    if replay.diverged_frame == None:
+        print(f"Replayed {replay.get_frame_count()} frames matching recording")
     else:
-        Settings.true_surface = pygame.display.set_mode(
-            Settings.RESOLUTION, flags=pygame.RESIZABLE)
-
-    # Inactive buffer display to be scaled to active displat
-    Settings.surface = pygame.Surface(
-        Settings.RESOLUTION, flags=pygame.SRCALPHA)
-    Settings.window_rect = Settings.get_window_rect()
-
-    # Just reintiliaze gui rather than deleting old gui because little performance effect
-    Settings.gui_manager = pygame_gui.UIManager(
-        Settings.RESOLUTION, Settings.SRC_DIRECTORY + "UI/pygamegui_theme.json")
-    Settings.gui_manager.add_font_paths(
-        "fff-forward", Settings.SRC_DIRECTORY + "UI/Fonts/pixel.ttf")
-    Settings.gui = Gui.Gui(
-        health_spritesheet_filename=Settings.SRC_DIRECTORY +"UI/Animations/health_spritesheet.json",
-        alternate_health_spritesheet_filename=Settings.SRC_DIRECTORY+"UI/Animations/health_spritesheet_alternate.json",
-        health_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/health_bar_outline.png",
-        alternate_health_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/health_bar_outline_alternate.png",
-        title_background_filename=Settings.SRC_DIRECTORY +
-        "UI/Animations/pixel_fog_spritesheet.json",
-        title_animation_filename=Settings.SRC_DIRECTORY +
-        "UI/Animations/title_logo_spritesheet.json",
-        save_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/save.png",
-        save_animation_filename=Settings.SRC_DIRECTORY +
-        "UI/Animations/save_spritesheet.json",
-    )
-
-    # Explicitly sclae gui to new resolution
-    Settings.gui_manager.mouse_pos_scale_factor = (
-        Settings.RESOLUTION[0] / Settings.true_surface.get_width(), Settings.RESOLUTION[1] / Settings.true_surface.get_height())
-
-# After exiting game update audio cache
-if Settings.CACHE:
-    try:
-        os.makedirs(Settings.SRC_DIRECTORY+".cache")
-    except FileExistsError:
-        pass
-
-    # Update sound cache
-    pickle.dump(Settings.MUSIC, open(
-        Settings.SRC_DIRECTORY+".cache/music.p", mode="wb+"))
-    pickle.dump(Settings.SOUND_EFFECTS, open(
-        Settings.SRC_DIRECTORY+".cache/sound_effects.p", mode="wb+"))
-    if Settings.DEBUG:
-        print("wrote sound cache")
-
-# Cleanup pygame
-pygame.display.quit()
-pygame.quit()
\ No newline at end of file
+        print(f"Replay diverged from recording by frame {replay.diverged_frame}")
+    if not profile_filename == None:
+        Settings.profiler.dump_csv(profile_filename)
+
+
+def main():
+    """ Runs game, restarting gameloop whenever display settings change """
+    parser = argparse.ArgumentParser(description="Ascendant")
+    parser.add_argument("--record", default=None, help="record inputs to replay file, starting in --level")
+    parser.add_argument("--replay", default=None, help="replay inputs from replay file then exit")
+    parser.add_argument("--level", default=Settings.DEFAULT_SAVE["save_level"], help="level recording starts in")
+    parser.add_argument("--seed", type=int, default=None, help="random seed of recording")
+    parser.add_argument("--profile", default=None, help="csv file to write replay frame timings to")
+    args = parser.parse_args()
+
+    if not args.replay == None:
+        run_replay(args.replay, args.profile)
+        Settings.presenter.close()
+        pygame.quit()
+        return
+
+    # Recording starts straight into level rather than title, ending when game quits or restarts
+    if not args.record == None:
+        recorder = Replay.Recorder(args.level, seed=args.seed)
+        recorder.start(level)
+        gameloop(is_title=False, replay=recorder)
+        recorder.save(args.record)
+        Settings.presenter.close()
+        pygame.quit()
+        return
+
+    # Keep refreshing display until game is quit
+    while gameloop() == 1:
+        if Settings.DEBUG:
+            print("Reset display and recalculated gui")
+
+        # Calculate new resolution and display info
+        Settings.RESOLUTION_STR = Settings.USER_SETTINGS["resolution"]
+        Settings.RESOLUTION = (int(Settings.RESOLUTION_STR.split(
+            'x')[0]), int(Settings.RESOLUTION_STR.split('x')[1]))
+
+        info = pygame.display.Info()
+        screen_width, screen_height = info.current_w, info.current_h
+        if platform.system() == "Windows":
+            # After the display has already been intialized display.info doesn't
+            # return the correct correct screen size on windows. Use windll to get 
+            # the correct resolution
+            # https://gamedev.stackexchange.com/questions/105750/pygame-fullsreen-display-issue
+            ctypes.windll.user32.SetProcessDPIAware()
+            true_res = (ctypes.windll.user32.GetSystemMetrics(0),
+                        ctypes.windll.user32.GetSystemMetrics(1))
+            screen_width, screen_height = true_res
+        # Display can't change while a frame is being presented
+        Settings.presenter.wait()
+        Settings.is_fullscreen = Settings.USER_SETTINGS["fullscreen"]
+        if Settings.USER_SETTINGS["fullscreen"]:
+            Settings.true_surface = pygame.display.set_mode(
+                (screen_width, screen_height), flags=pygame.FULLSCREEN)
+        else:
+            Settings.true_surface = pygame.display.set_mode(
+                Settings.RESOLUTION, flags=pygame.RESIZABLE)
+
+        # Inactive buffer display to be scaled to active displat
+        Settings.surface = pygame.Surface(
+            Settings.RESOLUTION, flags=pygame.SRCALPHA)
+        Settings.window_rect = Settings.get_window_rect()
+        Settings.presenter.rebuild(Settings.true_surface, Settings.surface)
+
+        # Just reintiliaze gui rather than deleting old gui because little performance effect
+        Settings.gui_manager = pygame_gui.UIManager(
+            Settings.RESOLUTION, Settings.SRC_DIRECTORY + "UI/pygamegui_theme.json")
+        Settings.gui_manager.add_font_paths(
+            "fff-forward", Settings.SRC_DIRECTORY + "UI/Fonts/pixel.ttf")
+        Settings.gui = Gui.Gui(
+            health_spritesheet_filename=Settings.SRC_DIRECTORY +"UI/Animations/health_spritesheet.json",
+            alternate_health_spritesheet_filename=Settings.SRC_DIRECTORY+"UI/Animations/health_spritesheet_alternate.json",
+            health_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/health_bar_outline.png",
+            alternate_health_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/health_bar_outline_alternate.png",
+            title_background_filename=Settings.SRC_DIRECTORY +
+            "UI/Animations/pixel_fog_spritesheet.json",
+            title_animation_filename=Settings.SRC_DIRECTORY +
+            "UI/Animations/title_logo_spritesheet.json",
+            save_sprite_filename=Settings.SRC_DIRECTORY+"UI/Images/save.png",
+            save_animation_filename=Settings.SRC_DIRECTORY +
+            "UI/Animations/save_spritesheet.json",
+        )
+
+        # Explicitly sclae gui to new resolution
+        Settings.gui_manager.mouse_pos_scale_factor = (
+            Settings.RESOLUTION[0] / Settings.true_surface.get_width(), Settings.RESOLUTION[1] / Settings.true_surface.get_height())
+
+    # After exiting game update audio cache
+    if Settings.CACHE and not Settings.NULL_AUDIO:
+        try:
+            os.makedirs(Settings.SRC_DIRECTORY+".cache")
+        except FileExistsError:
+            pass
+
+        # Update sound cache
+        pickle.dump(Settings.MUSIC, open(
+            Settings.SRC_DIRECTORY+".cache/music.p", mode="wb+"))
+        pickle.dump(Settings.SOUND_EFFECTS, open(
+            Settings.SRC_DIRECTORY+".cache/sound_effects.p", mode="wb+"))
+        if Settings.DEBUG:
+            print("wrote sound cache")
+
+    # Cleanup pygame
+    Settings.presenter.close()
+    pygame.display.quit()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()